@@ -0,0 +1,80 @@
+"""Buffered recording of answered sentences into the attempts table"""
+import time
+from datetime import date
+import db
+
+BATCH_SIZE = 50  # Attempts held in memory before they should be flushed
+NO_KEYSTROKES = (None,) * 5  # Keystroke columns of attempts that were not typed
+
+
+class AttemptLog:
+    """Collects attempts in memory and appends them to the database in batches
+
+    record() never touches the database, so grading an answer costs no
+    fsync. Callers flush once is_full at a convenient moment, and always
+    before the connection is closed.
+    """
+
+    def __init__(self, conn, batch_size=BATCH_SIZE):
+        self.conn = conn
+        self.batch_size = batch_size
+        self.pending = []
+
+    def record(
+        self,
+        list_id,
+        position,
+        mode,
+        exposure_ms,
+        answer,
+        correct,
+        accuracy=None,
+        latency_ms=None,
+        keystrokes=None,
+        timestamp=None,
+    ):
+        """Buffer a graded attempt
+
+        accuracy is the character accuracy if typed, latency_ms the time from
+        showing the sentence to the answer, and keystrokes the
+        KeystrokeSummary of a typed answer.
+        """
+        if timestamp is None:
+            timestamp = time.time()
+        self.pending.append(
+            (
+                list_id,
+                position,
+                timestamp,
+                date.fromtimestamp(timestamp).isoformat(),
+                mode,
+                exposure_ms,
+                answer,
+                int(bool(correct)),
+                accuracy,
+                latency_ms,
+            )
+            + (keystrokes.as_row() if keystrokes is not None else NO_KEYSTROKES)
+        )
+
+    @property
+    def is_full(self):
+        """Whether a batch is ready to be written"""
+        return len(self.pending) >= self.batch_size
+
+    def pending_stats(self, stats, list_id, position=None):
+        """Add buffered attempts of a list, or one of its sentences, to stats"""
+        for attempt in self.pending:
+            if attempt[0] == list_id and position in (None, attempt[1]):
+                stats.add(attempt[7], attempt[5])
+        return stats
+
+    def flush(self):
+        """Write all buffered attempts in one transaction
+
+        The rollup tables are updated by triggers in the same transaction.
+        """
+        if not self.pending:
+            return
+        db.add_attempts(self.conn, self.pending)
+        self.pending = []
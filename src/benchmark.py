@@ -0,0 +1,211 @@
+"""Benchmarks of storage, sampling and grading on synthetic sentence corpora
+
+Run with e.g. `python benchmark.py --corpus 1k 100k --output results.json`.
+Everything runs offline against throwaway databases and, since it drives
+the headless engine, without PyQt5.
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+import db
+from engine import Engine, get_lists_from_db
+from sampler import RANDOM, DECK
+from scheduler import REVIEW
+
+# Corpus name: (number of sentences, number of lists they are spread over)
+CORPORA = {
+    "1k": (1_000, 10),
+    "100k": (100_000, 100),
+    "1m": (1_000_000, 1_000),
+}
+SEED = 1234
+REPEAT = 1000  # Calls timed per benchmark, except for whole-corpus steps
+SYLLABLES = ("ka", "lo", "mi", "ne", "ru", "sa", "ti", "vo", "xe", "zu", "an", "er")
+
+
+def make_words(rng, count=2000):
+    """Vocabulary of pseudo-words built from a few syllables"""
+    return [
+        "".join(rng.choice(SYLLABLES) for _ in range(rng.randint(1, 4)))
+        for _ in range(count)
+    ]
+
+
+def make_sentences(rng, words, count):
+    """Sentences of 4 to 20 words, capitalised and ending in a full stop"""
+    sentences = []
+    for _ in range(count):
+        sentence = " ".join(rng.choices(words, k=rng.randint(4, 20)))
+        sentences.append(sentence.capitalize() + ".")
+    return sentences
+
+
+def misspell(rng, sentence):
+    """Sentence with one character replaced, as a typical near-miss answer"""
+    index = rng.randrange(len(sentence))
+    return sentence[:index] + "#" + sentence[index + 1 :]
+
+
+def summarize(durations_ns):
+    """Call count and mean/percentile durations in microseconds"""
+    durations_ns = sorted(durations_ns)
+    count = len(durations_ns)
+
+    def percentile(fraction):
+        return durations_ns[min(count - 1, int(fraction * count))] / 1000
+
+    return {
+        "calls": count,
+        "total_ms": sum(durations_ns) / 1_000_000,
+        "mean_us": sum(durations_ns) / count / 1000,
+        "p50_us": percentile(0.5),
+        "p95_us": percentile(0.95),
+        "p99_us": percentile(0.99),
+        "max_us": durations_ns[-1] / 1000,
+    }
+
+
+def measure(func, args_list):
+    """Time func once per argument tuple"""
+    clock = time.perf_counter_ns
+    durations = []
+    for args in args_list:
+        start = clock()
+        func(*args)
+        durations.append(clock() - start)
+    return summarize(durations)
+
+
+def bench_corpus(path, num_sentences, num_lists, seed=SEED, repeat=REPEAT):
+    """Run every benchmark on a new database holding the given corpus"""
+    rng = random.Random(seed)
+    words = make_words(rng)
+    per_list = num_sentences // num_lists
+    lists = [make_sentences(rng, words, per_list) for _ in range(num_lists)]
+
+    database = db.ConnectionManager(path)
+    conn = database.connect()
+    results = {}
+
+    list_ids = []
+    results["db.add_sentence_list"] = measure(
+        lambda sentences, title: list_ids.append(
+            db.add_sentence_list(conn, sentences, title, 0, 0)
+        ),
+        [(sentences, f"List {index}") for index, sentences in enumerate(lists)],
+    )
+    del lists
+
+    results["db.update_sentence_list_fields"] = measure(
+        db.update_sentence_list_fields,
+        [
+            (
+                conn,
+                rng.choice(list_ids),
+                {
+                    "title": f"Renamed {index}",
+                    "num_completed": index,
+                    "num_correct": index // 2,
+                },
+            )
+            for index in range(repeat)
+        ],
+    )
+    results["db.get_all_sentence_lists"] = measure(
+        db.get_all_sentence_lists, [(conn,)] * max(1, repeat // 10)
+    )
+    results["get_lists_from_db"] = measure(
+        get_lists_from_db, [(conn,)] * max(1, repeat // 10)
+    )
+
+    engine = Engine(database)
+    for mode in (RANDOM, DECK, REVIEW):
+        engine.user.selection_mode = mode
+        engine.use_sentence_list(engine.sentence_lists[-1])
+        engine.current_list.unload()
+        # The first draw fetches the list's sentences from the database
+        results[f"get_random_sentence.first[{mode}]"] = measure(
+            engine.next_sentence, [()]
+        )
+        results[f"get_random_sentence[{mode}]"] = measure(
+            engine.next_sentence, [()] * repeat
+        )
+
+    engine.user.selection_mode = RANDOM
+    shown = []
+    for _ in range(repeat):
+        sentence = engine.next_sentence()
+        shown.append((engine.controller.current_position, sentence))
+
+    def check_answer(position, sentence, answer):
+        engine.controller.current_position = position
+        engine.controller.current_sentence = sentence
+        engine.controller.sentence_active = True
+        engine.check_answer(answer)
+
+    results["check_answer"] = measure(
+        check_answer,
+        [(position, text, misspell(rng, text)) for position, text in shown],
+    )
+    results["check_answer.correct"] = measure(
+        check_answer, [(position, text, text) for position, text in shown]
+    )
+
+    engine.close()
+    return {
+        "sentences": per_list * num_lists,
+        "lists": num_lists,
+        "database_bytes": os.path.getsize(path),
+        "results": results,
+    }
+
+
+def environment():
+    """Versions the results depend on"""
+    return {
+        "python": platform.python_version(),
+        "sqlite": sqlite3.sqlite_version,
+        "platform": platform.platform(),
+        "timestamp": time.time(),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--corpus", nargs="+", choices=list(CORPORA), default=list(CORPORA)
+    )
+    parser.add_argument("--repeat", type=int, default=REPEAT)
+    parser.add_argument("--seed", type=int, default=SEED)
+    parser.add_argument("--output", help="JSON file to write instead of stdout")
+    args = parser.parse_args(argv)
+
+    report = {"environment": environment(), "seed": args.seed, "corpora": {}}
+    with tempfile.TemporaryDirectory() as directory:
+        for name in args.corpus:
+            num_sentences, num_lists = CORPORA[name]
+            print(f"Benchmarking {name}...", file=sys.stderr)
+            report["corpora"][name] = bench_corpus(
+                os.path.join(directory, f"{name}.db"),
+                num_sentences,
+                num_lists,
+                args.seed,
+                args.repeat,
+            )
+
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(report, file, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+
+
+if __name__ == "__main__":
+    main()
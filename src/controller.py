@@ -1,16 +1,21 @@
 """General functions used in the application"""
-from sentence_list import SentenceList
+import db
+from models import SentenceList
+from scheduler import REVIEW, ReviewScheduler, ReviewState
 
 
 class Controller:
-    def __init__(self, sentence_lists):
+    def __init__(self, sentence_lists, conn=None):
         super().__init__()
 
+        self.conn = conn  # Connection used to load and save review state
+        self.scheduler = None  # ReviewScheduler of the current list
         self.sentence_lists = sentence_lists
         self.current_list = None
         self.get_start_list()  # Get initial sentence list
         self.deleted_lists = []
         self.current_sentence = ""
+        self.current_position = None  # Index of current_sentence in current_list
         self.sentence_active = False
 
     def get_start_list(self):
@@ -20,6 +25,44 @@ class Controller:
         else:
             self.current_list = SentenceList()
 
+    def next_position(self, mode, length_range=None):
+        """Position of the next sentence to show from the current list
+
+        The optional (unit, min_length, max_length) filter applies to random
+        and deck modes; None is returned when no sentence passes it.
+        """
+        if mode == REVIEW:
+            return self.get_scheduler().next()
+        return self.current_list.draw(mode, length_range)
+
+    def get_scheduler(self):
+        """Review scheduler of the current list, loading its state on first use"""
+        current_list = self.current_list
+        if self.scheduler is None or self.scheduler.sentence_list is not current_list:
+            self.save_reviews()
+            states = []
+            if self.conn is not None and current_list.list_id is not None:
+                states = [
+                    ReviewState(*row)
+                    for row in db.get_reviews(self.conn, current_list.list_id)
+                ]
+            self.scheduler = ReviewScheduler(current_list, states)
+        return self.scheduler
+
+    def grade(self, quality):
+        """Update the review state of the current sentence (quality 0-5)"""
+        if self.current_position is None or self.current_list.list_id is None:
+            return
+        self.get_scheduler().grade(self.current_position, quality)
+
+    def save_reviews(self):
+        """Write review states changed since the last save"""
+        if self.scheduler is None or not self.scheduler.dirty or self.conn is None:
+            return
+        if self.scheduler.sentence_list.list_id is not None:
+            db.save_reviews(self.conn, self.scheduler.dirty_rows())
+        self.scheduler.dirty.clear()
+
     def print_all_lists(self):
         """For testing purposes to see all sentence lists"""
         for sentence_list in self.sentence_lists:
@@ -1,77 +1,1005 @@
 """Managing the sqlite3 database"""
+import hashlib
+import json
 import sqlite3
+from contextlib import contextmanager
+import dedupe
+from length_index import CHARS, sentence_lengths
+from stats import STATS_COLUMNS, AttemptStats
+
+
+SCHEMA_VERSION = 16
+
+# Attribute names of SentenceList and User mapped to their table columns
+LIST_COLUMNS = {
+    "title": "title",
+    "num_completed": "numCompleted",
+    "num_correct": "numCorrect",
+    "deck_seed": "deckSeed",
+    "deck_position": "deckPosition",
+}
+USER_COLUMNS = {
+    "num_correct": "numCorrect",
+    "default_path": "defaultPath",
+    "timer_duration": "timerDuration",
+    "char_timer_value": "charTimerValue",
+    "char_based_timer": "charBasedTimer",
+    "no_typing": "noTyping",
+    "auto_start": "autoStart",
+    "show_correct_sentence": "showCorrectAnswer",
+    "dark_mode": "darkMode",
+    "selection_mode": "selectionMode",
+    "min_length": "minLength",
+    "max_length": "maxLength",
+    "length_unit": "lengthUnit",
+}
+
+
+PRAGMAS = (
+    "PRAGMA journal_mode = WAL",
+    "PRAGMA synchronous = NORMAL",
+    "PRAGMA foreign_keys = ON",
+    "PRAGMA temp_store = MEMORY",
+    "PRAGMA cache_size = -16000",
+)
+CACHED_STATEMENTS = 256
+LIKE_ESCAPES = str.maketrans({"\\": "\\\\", "%": "\\%", "_": "\\_"})
+# Columns of attempt rows, in the order AttemptLog records them
+ATTEMPT_COLUMNS = (
+    "listId",
+    "position",
+    "timestamp",
+    "day",
+    "mode",
+    "exposureMs",
+    "answer",
+    "correct",
+    "accuracy",
+    "latencyMs",
+    "keystrokes",
+    "wpm",
+    "keyIntervals",
+    "backspaceRate",
+    "firstKeyMs",
+)
+# Key columns of each attempt rollup table
+STATS_KEYS = {
+    "listStats": ("listId",),
+    "sentenceStats": ("listId", "position"),
+    "dayStats": ("day",),
+}
+STATS_SELECT = ", ".join(STATS_COLUMNS)
+# Indexed columns holding the LSH bands of each sentence's MinHash signature
+BAND_COLUMNS = tuple(f"band{band}" for band in range(dedupe.BANDS))
+
+
+class Connection(sqlite3.Connection):
+    """sqlite3 connection whose commits can be grouped with transaction()"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.transaction_depth = 0
+
+    def commit(self):
+        """Commit, unless inside transaction() which commits once at its end"""
+        if not self.transaction_depth:
+            super().commit()
+
+    @contextmanager
+    def transaction(self):
+        """Make every write in the block share one commit
+
+        Transactions nest; only the outermost one commits, or rolls back if
+        an exception escapes it.
+        """
+        self.transaction_depth += 1
+        try:
+            yield self
+        except BaseException:
+            self.transaction_depth -= 1
+            if not self.transaction_depth:
+                self.rollback()
+            raise
+        self.transaction_depth -= 1
+        if not self.transaction_depth:
+            super().commit()
+
+
+class ConnectionManager:
+    """Owns the application's database connection
+
+    The schema is created and migrated once, when the first connection is
+    opened. Worker threads get their own connections from open().
+    """
+
+    def __init__(self, db_file):
+        self.db_file = db_file
+        self.connection = None
+        self.schema_ready = False
+
+    def open(self):
+        """Open a new tuned connection to the database"""
+        conn = sqlite3.connect(
+            self.db_file, factory=Connection, cached_statements=CACHED_STATEMENTS
+        )
+        for pragma in PRAGMAS:
+            conn.execute(pragma)
+        if not self.schema_ready:
+            create_users_table(conn)
+            migrate(conn)
+            self.schema_ready = True
+        return conn
+
+    def connect(self):
+        """Get the shared connection, opening it on first use"""
+        if self.connection is None:
+            self.connection = self.open()
+        return self.connection
+
+    def transaction(self):
+        """Transaction context manager on the shared connection"""
+        return self.connect().transaction()
+
+    def close(self):
+        """Close the shared connection"""
+        if self.connection is not None:
+            self.connection.close()
+            self.connection = None
 
 
 def create_connection(db_file):
     """Create a connection and create necessary tables if nonexistent"""
     conn = None
     try:
-        conn = sqlite3.connect(db_file)
-        create_users_table(conn)
-        create_sentence_lists_table(conn)
+        conn = ConnectionManager(db_file).open()
     except sqlite3.Error as err:
         print(err)
 
     return conn
 
 
+def migrate(conn):
+    """Bring the sentence list schema up to the current version"""
+    version = conn.execute("PRAGMA user_version").fetchone()[0]
+    if version < 1:
+        create_sentence_lists_table(conn)
+    if version < 2:
+        add_digest_column(conn)
+    if version < 3:
+        add_size_column(conn)
+    if version < 4:
+        create_attempts_table(conn)
+    if version < 5:
+        add_sampler_columns(conn)
+    if version < 6:
+        create_reviews_table(conn)
+    if version < 7:
+        add_length_columns(conn)
+    if version < 8:
+        conn.execute("ALTER TABLE attempts ADD COLUMN accuracy REAL")
+    if version < 9:
+        create_sentence_search_table(conn)
+    if version < 10:
+        # Lists read from a sentence pack file have no rows in sentences
+        conn.execute("ALTER TABLE lists ADD COLUMN packPath TEXT")
+    if version < 11:
+        add_duplicate_columns(conn)
+    if version < 12:
+        create_stats_tables(conn)
+    if version < 13:
+        conn.execute("ALTER TABLE attempts ADD COLUMN latencyMs INTEGER")
+    if version < 14:
+        add_keystroke_columns(conn)
+    if version < 15:
+        create_transfer_tables(conn)
+    if version < 16:
+        index_bands_by_list(conn)
+    if version < 1:
+        # Legacy rows are inserted through the current schema's code path
+        migrate_legacy_sentence_lists(conn)
+    conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+    conn.commit()
+
+
 def create_sentence_lists_table(conn):
-    """Create table for sentence lists"""
-    try:
-        sql = """CREATE TABLE sentenceLists (
-            sentences String,
-            title String,
-            numCompleted Int,
-            numCorrect Int
+    """Create tables for sentence lists and their sentences"""
+    conn.execute(
+        """CREATE TABLE IF NOT EXISTS lists (
+            id INTEGER PRIMARY KEY,
+            title TEXT NOT NULL,
+            numCompleted INTEGER NOT NULL DEFAULT 0,
+            numCorrect INTEGER NOT NULL DEFAULT 0
         )"""
-        conn.execute(sql)
-    except sqlite3.Error as err:
+    )
+    conn.execute(
+        """CREATE TABLE IF NOT EXISTS sentences (
+            id INTEGER PRIMARY KEY,
+            listId INTEGER NOT NULL REFERENCES lists(id) ON DELETE CASCADE,
+            position INTEGER NOT NULL,
+            text TEXT NOT NULL
+        )"""
+    )
+    conn.execute("CREATE INDEX IF NOT EXISTS listsTitle ON lists(title)")
+    conn.execute(
+        """CREATE UNIQUE INDEX IF NOT EXISTS sentencesListPosition
+        ON sentences(listId, position)"""
+    )
+
+
+def migrate_legacy_sentence_lists(conn):
+    """Move lists stored as one JSON blob per row into the normalized tables
+
+    The sentences are cleaned as the importer cleans lines, so a migrated
+    list is stored exactly as if its file had been imported.
+    """
+    from importer import clean_lines  # importer itself imports db
+
+    legacy = conn.execute(
+        """SELECT name FROM sqlite_master
+        WHERE type = 'table' AND name = 'sentenceLists'"""
+    ).fetchone()
+    if not legacy:
+        return
+
+    for sentences, title, num_completed, num_correct in conn.execute(
+        "SELECT sentences, title, numCompleted, numCorrect FROM sentenceLists"
+    ).fetchall():
+        _insert_sentence_list(
+            conn,
+            dedupe.unique_lines(clean_lines(json.loads(sentences))),
+            title,
+            num_completed or 0,
+            num_correct or 0,
+        )
+    conn.execute("DROP TABLE sentenceLists")
+
+
+def add_digest_column(conn):
+    """Add an indexed content digest to every list for duplicate lookups"""
+    conn.execute("ALTER TABLE lists ADD COLUMN digest TEXT")
+    for (list_id,) in conn.execute("SELECT id FROM lists").fetchall():
+        conn.execute(
+            "UPDATE lists SET digest = ? WHERE id = ?",
+            (sentences_digest(get_sentences(conn, list_id)), list_id),
+        )
+    conn.execute("CREATE INDEX IF NOT EXISTS listsDigest ON lists(digest)")
+
+
+def add_size_column(conn):
+    """Store each list's sentence count so lists can be listed without loading"""
+    conn.execute("ALTER TABLE lists ADD COLUMN size INTEGER NOT NULL DEFAULT 0")
+    conn.execute(
+        """UPDATE lists SET size = (
+            SELECT COUNT(*) FROM sentences WHERE sentences.listId = lists.id
+        )"""
+    )
+
+
+def add_sampler_columns(conn):
+    """Store each list's shuffled deck and the user's selection mode"""
+    conn.execute("ALTER TABLE lists ADD COLUMN deckSeed INTEGER")
+    conn.execute("ALTER TABLE lists ADD COLUMN deckPosition INTEGER NOT NULL DEFAULT 0")
+    conn.execute("ALTER TABLE users ADD COLUMN selectionMode TEXT DEFAULT 'random'")
+
+
+def add_length_columns(conn):
+    """Store and index sentence lengths, and the user's length filter"""
+    conn.execute("ALTER TABLE sentences ADD COLUMN numChars INTEGER NOT NULL DEFAULT 0")
+    conn.execute("ALTER TABLE sentences ADD COLUMN numWords INTEGER NOT NULL DEFAULT 0")
+    rows = conn.execute("SELECT id, text FROM sentences").fetchall()
+    conn.executemany(
+        "UPDATE sentences SET numChars = ?, numWords = ? WHERE id = ?",
+        (sentence_lengths(text) + (sentence_id,) for sentence_id, text in rows),
+    )
+    conn.execute(
+        """CREATE INDEX IF NOT EXISTS sentencesListChars
+        ON sentences(listId, numChars, position)"""
+    )
+    conn.execute(
+        """CREATE INDEX IF NOT EXISTS sentencesListWords
+        ON sentences(listId, numWords, position, numChars)"""
+    )
+    conn.execute("ALTER TABLE users ADD COLUMN minLength INTEGER DEFAULT 0")
+    conn.execute("ALTER TABLE users ADD COLUMN maxLength INTEGER DEFAULT 0")
+    conn.execute(f"ALTER TABLE users ADD COLUMN lengthUnit TEXT DEFAULT '{CHARS}'")
+
+
+def create_sentence_search_table(conn):
+    """Create the full-text index of sentences, kept current by triggers
+
+    The index stores no text of its own (external content), and the
+    triggers update it in the same statements that change sentences. SQLite
+    builds without FTS5 are reported and fall back to scanning.
+    """
+    try:
+        conn.execute(
+            """CREATE VIRTUAL TABLE IF NOT EXISTS sentencesSearch USING fts5(
+                text,
+                content = 'sentences',
+                content_rowid = 'id',
+                tokenize = 'unicode61 remove_diacritics 2'
+            )"""
+        )
+    except sqlite3.OperationalError as err:
         print(err)
+        return
+    conn.execute(
+        """CREATE TRIGGER IF NOT EXISTS sentencesSearchInsert
+        AFTER INSERT ON sentences BEGIN
+            INSERT INTO sentencesSearch(rowid, text) VALUES (new.id, new.text);
+        END"""
+    )
+    conn.execute(
+        """CREATE TRIGGER IF NOT EXISTS sentencesSearchDelete
+        AFTER DELETE ON sentences BEGIN
+            INSERT INTO sentencesSearch(sentencesSearch, rowid, text)
+            VALUES ('delete', old.id, old.text);
+        END"""
+    )
+    conn.execute(
+        """CREATE TRIGGER IF NOT EXISTS sentencesSearchUpdate
+        AFTER UPDATE OF text ON sentences BEGIN
+            INSERT INTO sentencesSearch(sentencesSearch, rowid, text)
+            VALUES ('delete', old.id, old.text);
+            INSERT INTO sentencesSearch(rowid, text) VALUES (new.id, new.text);
+        END"""
+    )
+    conn.execute("INSERT INTO sentencesSearch(sentencesSearch) VALUES ('rebuild')")
+
+
+def add_duplicate_columns(conn):
+    """Store the LSH bands of every sentence and flag near-duplicates
+
+    A sentence whose words match an earlier sentence's, or differ by one
+    word, has duplicateOf set to that sentence's id. Candidates are found
+    through the band indexes, so each lookup stays sublinear in the number
+    of stored sentences.
+    """
+    for column in BAND_COLUMNS:
+        conn.execute(f"ALTER TABLE sentences ADD COLUMN {column} INTEGER")
+    conn.execute("ALTER TABLE sentences ADD COLUMN duplicateOf INTEGER")
+    rows = conn.execute("SELECT id, text FROM sentences").fetchall()
+    assignments = ", ".join(f"{column} = ?" for column in BAND_COLUMNS)
+    conn.executemany(
+        f"UPDATE sentences SET {assignments} WHERE id = ?",
+        (sentence_bands(text) + (sentence_id,) for sentence_id, text in rows),
+    )
+    for column in BAND_COLUMNS:
+        conn.execute(
+            f"""CREATE INDEX IF NOT EXISTS sentences{column.title()}
+            ON sentences({column}) WHERE {column} IS NOT NULL"""
+        )
+    conn.execute(
+        """CREATE INDEX IF NOT EXISTS sentencesListDuplicates
+        ON sentences(listId, position) WHERE duplicateOf IS NOT NULL"""
+    )
+    conn.execute(
+        """CREATE INDEX IF NOT EXISTS sentencesDuplicateOf
+        ON sentences(duplicateOf) WHERE duplicateOf IS NOT NULL"""
+    )
+    conn.execute(
+        """CREATE TRIGGER IF NOT EXISTS sentencesDuplicateDelete
+        AFTER DELETE ON sentences BEGIN
+            UPDATE sentences SET duplicateOf = NULL WHERE duplicateOf = old.id;
+        END"""
+    )
+    flag_near_duplicates(conn)
+
+
+def index_bands_by_list(conn):
+    """Index the bands by list, and reflag near-duplicates preferring the same list
+
+    Sentences used to be flagged against the oldest matching sentence,
+    which was often in another list and hid repeats within their own list.
+    """
+    for column in BAND_COLUMNS:
+        conn.execute(f"DROP INDEX IF EXISTS sentences{column.title()}")
+        conn.execute(
+            f"""CREATE INDEX IF NOT EXISTS sentences{column.title()}List
+            ON sentences({column}, listId) WHERE {column} IS NOT NULL"""
+        )
+    conn.execute(
+        "UPDATE sentences SET duplicateOf = NULL WHERE duplicateOf IS NOT NULL"
+    )
+    flag_near_duplicates(conn)
+
+
+def sentence_bands(text):
+    """Values of BAND_COLUMNS for a sentence, all None if it has no words"""
+    return dedupe.signature(dedupe.sentence_words(text)) or (None,) * dedupe.BANDS
+
+
+def flag_near_duplicates(conn, list_id=None, start=0, stop=None):
+    """Store the bands of sentences and flag those repeating an earlier one
+
+    Only the sentences of list_id at positions start to stop are checked
+    when a list is given. Bands missing since the sentences were inserted
+    are stored first. Each sentence is compared with the oldest
+    CANDIDATES_PER_BAND earlier sentences of its own list in each of its
+    bands, then with as many from any list, read in index order, so
+    sentences sharing a crowded band cost no more than others. Matches in
+    the sentence's own list are preferred, as only those are skipped when
+    drawing. Returns the number flagged.
+    """
+    columns = ", ".join(BAND_COLUMNS)
+    if list_id is None:
+        rows = conn.execute(
+            f"SELECT id, listId, text, {columns} FROM sentences ORDER BY id"
+        )
+    else:
+        rows = conn.execute(
+            f"""SELECT id, listId, text, {columns} FROM sentences
+            WHERE listId = ? AND position >= ? AND position < ? ORDER BY position""",
+            (list_id, start, stop),
+        )
+    sentences = []
+    missing = []  # Bands of sentences inserted since the last check
+    for sentence_id, sentence_list, text, *bands in rows.fetchall():
+        if bands[0] is None:
+            bands = sentence_bands(text)
+            if bands[0] is None:
+                continue
+            missing.append(bands + (sentence_id,))
+        sentences.append((sentence_id, sentence_list, text, bands))
+    assignments = ", ".join(f"{column} = ?" for column in BAND_COLUMNS)
+    conn.executemany(f"UPDATE sentences SET {assignments} WHERE id = ?", missing)
+
+    limit = dedupe.CANDIDATES_PER_BAND
+    sql = " UNION ALL ".join(
+        f"""SELECT * FROM (SELECT id, listId, text FROM sentences
+            WHERE {column} = ? AND listId = ? AND id < ? ORDER BY id LIMIT {limit})
+        UNION ALL
+        SELECT * FROM (SELECT id, listId, text FROM sentences
+            WHERE {column} = ? AND id < ? ORDER BY listId, id LIMIT {limit})"""
+        for column in BAND_COLUMNS
+    )
+    flags = []
+    for sentence_id, sentence_list, text, bands in sentences:
+        words = None  # Most sentences have no candidates to compare with
+        params = []
+        for band in bands:
+            params += (band, sentence_list, sentence_id, band, sentence_id)
+        candidates = sorted(
+            set(conn.execute(sql, params)),
+            key=lambda row: (row[1] != sentence_list, row[0]),
+        )
+        for candidate_id, _, candidate in candidates:
+            if words is None:
+                words = dedupe.sentence_words(text)
+            if dedupe.is_near_duplicate(words, dedupe.sentence_words(candidate)):
+                flags.append((candidate_id, sentence_id))
+                break
+    conn.executemany("UPDATE sentences SET duplicateOf = ? WHERE id = ?", flags)
+    return len(flags)
+
+
+def sentences_digest(sentences):
+    """SHA-256 hex digest of a list's lines, ignoring trailing whitespace"""
+    hasher = hashlib.sha256()
+    for sentence in sentences:
+        digest_sentence(hasher, sentence)
+    return hasher.hexdigest()
+
+
+def digest_sentence(hasher, sentence):
+    """Feed one sentence into a running sentences_digest hasher"""
+    hasher.update(sentence.rstrip().encode("utf-8"))
+    hasher.update(b"\n")
 
 
 def drop_sentence_lists_table(conn):
-    """Delete table for sentence lists"""
-    sql = """DROP TABLE sentenceLists"""
-    conn.execute(sql)
+    """Delete tables for sentence lists"""
+    conn.execute("DROP TABLE sentences")
+    conn.execute("DROP TABLE lists")
     conn.commit()
 
 
 def get_all_sentence_lists(conn):
-    """Get all sentence lists from table"""
+    """Get list metadata (id, title, numCompleted, numCorrect, digest, size,
+    deckSeed, deckPosition, packPath)
+
+    Sentences themselves are fetched separately with get_sentences, or from
+    the pack file for lists with a packPath.
+    """
     cursor = conn.cursor()
-    cursor.execute("SELECT * FROM sentenceLists")
+    cursor.execute(
+        """SELECT id, title, numCompleted, numCorrect, digest, size,
+            deckSeed, deckPosition, packPath
+        FROM lists ORDER BY id"""
+    )
     data = cursor.fetchall()
     return data
 
 
+def get_sentences(conn, list_id):
+    """Get the sentences of a single list in their original order"""
+    cursor = conn.execute(
+        "SELECT text FROM sentences WHERE listId = ? ORDER BY position", (list_id,)
+    )
+    return [row[0] for row in cursor]
+
+
+def iter_sentences(conn, list_id):
+    """Yield the sentences of a single list in order, without building a list"""
+    cursor = conn.execute(
+        "SELECT text FROM sentences WHERE listId = ? ORDER BY position", (list_id,)
+    )
+    for (text,) in cursor:
+        yield text
+
+
+def get_length_entries(conn, list_id, unit=CHARS):
+    """Get (length, position, numChars) of a list's sentences sorted by length
+
+    Lengths count characters or words depending on unit; the rows are read
+    in order straight from the length indexes.
+    """
+    if unit == CHARS:
+        sql = """SELECT numChars, position, numChars FROM sentences
+            WHERE listId = ? ORDER BY numChars, position"""
+    else:
+        sql = """SELECT numWords, position, numChars FROM sentences
+            WHERE listId = ? ORDER BY numWords, position"""
+    return conn.execute(sql, (list_id,))
+
+
+def get_duplicate_positions(conn, list_id):
+    """Positions of a list's sentences that repeat an earlier one in the list"""
+    sql = """SELECT s.position FROM sentences s
+        JOIN sentences original ON original.id = s.duplicateOf
+        WHERE s.listId = ? AND s.duplicateOf IS NOT NULL
+        AND original.listId = s.listId"""
+    return [position for (position,) in conn.execute(sql, (list_id,))]
+
+
+def find_sentence_list(conn, digest):
+    """Get the id of a list with the given content digest, or None"""
+    row = conn.execute(
+        "SELECT id FROM lists WHERE digest = ? LIMIT 1", (digest,)
+    ).fetchone()
+    return row[0] if row else None
+
+
+def get_sentence_list(conn, list_id):
+    """Get the metadata row of a single list, in get_all_sentence_lists order"""
+    return conn.execute(
+        """SELECT id, title, numCompleted, numCorrect, digest, size,
+            deckSeed, deckPosition, packPath
+        FROM lists WHERE id = ?""",
+        (list_id,),
+    ).fetchone()
+
+
+def insert_list(conn, title, num_completed=0, num_correct=0):
+    """Insert an empty list row without committing, returning its id"""
+    cursor = conn.execute(
+        "INSERT INTO lists(title, numCompleted, numCorrect) VALUES (?, ?, ?)",
+        (title, num_completed, num_correct),
+    )
+    return cursor.lastrowid
+
+
+def insert_sentences(conn, list_id, sentences, start=0, hasher=None):
+    """Insert sentences from position start without committing
+
+    The sentences are fed to hasher (see sentences_digest) when one is
+    given. Their bands are left empty, so that inserting stays a plain bulk
+    load; flag_near_duplicates stores them afterwards. Returns the number
+    of sentences inserted.
+    """
+    count = 0
+
+    def rows():
+        nonlocal count
+        for position, text in enumerate(sentences, start):
+            if hasher is not None:
+                digest_sentence(hasher, text)
+            count += 1
+            yield (list_id, position, text) + sentence_lengths(text)
+
+    conn.executemany(
+        """INSERT INTO sentences(listId, position, text, numChars, numWords)
+        VALUES (?, ?, ?, ?, ?)""",
+        rows(),
+    )
+    return count
+
+
+def set_list_content(conn, list_id, digest, size):
+    """Record the digest and size of a list once its sentences are inserted"""
+    conn.execute(
+        "UPDATE lists SET digest = ?, size = ? WHERE id = ?", (digest, size, list_id)
+    )
+
+
+def _insert_sentence_list(conn, sentences, title, num_completed, num_correct):
+    """Insert list and sentence rows without committing, returning the list id"""
+    list_id = insert_list(conn, title, num_completed, num_correct)
+    hasher = hashlib.sha256()
+    size = insert_sentences(conn, list_id, sentences, hasher=hasher)
+    flag_near_duplicates(conn, list_id, 0, size)
+    set_list_content(conn, list_id, hasher.hexdigest(), size)
+    return list_id
+
+
 def add_sentence_list(conn, sentences, title, num_completed, num_correct):
-    """Add new sentence list row to table"""
+    """Add a new sentence list and its sentences, returning the new list id"""
+    list_id = _insert_sentence_list(conn, sentences, title, num_completed, num_correct)
+    conn.commit()
+    return list_id
+
+
+def add_pack_list(conn, title, pack_path, digest, size):
+    """Add a list whose sentences are read from a pack file, returning its id"""
+    cursor = conn.execute(
+        """INSERT INTO lists(title, digest, size, packPath)
+        VALUES (?, ?, ?, ?)""",
+        (title, digest, size, pack_path),
+    )
+    conn.commit()
+    return cursor.lastrowid
+
+
+def update_sentence_list_fields(conn, list_id, changes):
+    """Update only the given list attributes, keyed as in LIST_COLUMNS"""
+    if not changes:
+        return
+    names = sorted(changes)
+    assignments = ", ".join(f"{LIST_COLUMNS[name]} = ?" for name in names)
     conn.execute(
-        "INSERT INTO sentenceLists(sentences, title, numCompleted, numCorrect) VALUES (?, ?, ?, ?)",
-        (sentences, title, num_completed, num_correct),
+        f"UPDATE lists SET {assignments} WHERE id = ?",
+        [changes[name] for name in names] + [list_id],
     )
     conn.commit()
 
 
-def update_sentence_list(conn, sentences, title, num_completed, num_correct):
-    """Update sentence list within table"""
-    sql = """UPDATE sentenceLists SET sentences = ?, title = ?,
-        numCompleted = ?, numCorrect = ? WHERE sentences = ?"""
-    conn.execute(sql, (sentences, title, num_completed, num_correct, sentences))
+def delete_sentence_list(conn, list_id):
+    """Delete a sentence list with its sentences and attempt history
+
+    The day rollups still count the list's attempts, as practice done.
+    """
+    conn.execute("DELETE FROM attempts WHERE listId = ?", (list_id,))
+    conn.execute("DELETE FROM reviews WHERE listId = ?", (list_id,))
+    conn.execute("DELETE FROM listStats WHERE listId = ?", (list_id,))
+    conn.execute("DELETE FROM sentenceStats WHERE listId = ?", (list_id,))
+    conn.execute("DELETE FROM sentences WHERE listId = ?", (list_id,))
+    conn.execute("DELETE FROM lists WHERE id = ?", (list_id,))
     conn.commit()
 
 
-def delete_sentence_list(conn, sentences):
-    """Delete a sentence list within table"""
-    sql = "DELETE FROM sentenceLists WHERE sentences = ?"
-    conn.execute(sql, (sentences,))
+def has_sentence_search(conn):
+    """Whether the full-text index of sentences exists"""
+    return (
+        conn.execute(
+            """SELECT 1 FROM sqlite_master
+            WHERE type = 'table' AND name = 'sentencesSearch'"""
+        ).fetchone()
+        is not None
+    )
+
+
+def search_terms(text):
+    """Words of a search, or the whole text as one phrase if it is in double quotes"""
+    text = text.strip()
+    if len(text) > 1 and text[0] == text[-1] == '"':
+        return [text[1:-1]]
+    return text.split()
+
+
+def search_sentences(conn, text, missed_only=False, list_id=None, limit=-1):
+    """Get (listId, title, position, text) of sentences matching a search
+
+    Every search term must appear in a sentence, best matches first.
+    missed_only keeps sentences answered incorrectly at least once, and
+    list_id restricts the search to one list. A negative limit returns every
+    match.
+    """
+    terms = search_terms(text)
+    if not terms:
+        return []
+    sql = """SELECT sentences.listId, lists.title, sentences.position,
+            sentences.text"""
+    if has_sentence_search(conn):
+        # Each term is quoted so FTS5 reads it as a phrase, not as syntax
+        sql += """ FROM sentencesSearch
+            JOIN sentences ON sentences.id = sentencesSearch.rowid
+            JOIN lists ON lists.id = sentences.listId
+            WHERE sentencesSearch MATCH ?"""
+        params = [" ".join('"' + term.replace('"', '""') + '"' for term in terms)]
+        order = "sentencesSearch.rank"
+    else:
+        sql += """ FROM sentences JOIN lists ON lists.id = sentences.listId
+            WHERE 1"""
+        sql += " AND sentences.text LIKE ? ESCAPE '\\'" * len(terms)
+        params = ["%" + term.translate(LIKE_ESCAPES) + "%" for term in terms]
+        order = "sentences.listId, sentences.position"
+
+    if list_id is not None:
+        sql += " AND sentences.listId = ?"
+        params.append(list_id)
+    if missed_only:
+        sql += """ AND EXISTS (SELECT 1 FROM attempts
+            WHERE attempts.listId = sentences.listId
+            AND attempts.position = sentences.position AND attempts.correct = 0)"""
+    sql += f" ORDER BY {order} LIMIT ?"
+    params.append(limit)
+    return conn.execute(sql, params).fetchall()
+
+
+def create_attempts_table(conn):
+    """Create the append-only log of answered sentences and its indexes"""
+    conn.execute(
+        """CREATE TABLE IF NOT EXISTS attempts (
+            id INTEGER PRIMARY KEY,
+            listId INTEGER NOT NULL,
+            position INTEGER NOT NULL,
+            timestamp REAL NOT NULL,
+            day TEXT NOT NULL,
+            mode TEXT NOT NULL,
+            exposureMs INTEGER,
+            answer TEXT,
+            correct INTEGER NOT NULL
+        )"""
+    )
+    # Covering indexes for per-list, per-sentence and per-day statistics
+    conn.execute(
+        """CREATE INDEX IF NOT EXISTS attemptsList
+        ON attempts(listId, timestamp, correct, exposureMs)"""
+    )
+    conn.execute(
+        """CREATE INDEX IF NOT EXISTS attemptsSentence
+        ON attempts(listId, position, timestamp, correct, exposureMs)"""
+    )
+    conn.execute(
+        """CREATE INDEX IF NOT EXISTS attemptsDay
+        ON attempts(day, listId, correct, exposureMs)"""
+    )
+
+
+def add_keystroke_columns(conn):
+    """Store the keystroke summary of typed attempts
+
+    keyIntervals holds the inter-key interval histogram as a JSON list of
+    counts per keystrokes.INTERVAL_BUCKETS bucket.
+    """
+    conn.execute("ALTER TABLE attempts ADD COLUMN keystrokes INTEGER")
+    conn.execute("ALTER TABLE attempts ADD COLUMN wpm REAL")
+    conn.execute("ALTER TABLE attempts ADD COLUMN keyIntervals TEXT")
+    conn.execute("ALTER TABLE attempts ADD COLUMN backspaceRate REAL")
+    conn.execute("ALTER TABLE attempts ADD COLUMN firstKeyMs INTEGER")
+
+
+def add_attempts(conn, attempts):
+    """Append attempt rows in one batch
+
+    Each row holds the ATTEMPT_COLUMNS values in order.
+    """
+    conn.executemany(
+        f"""INSERT INTO attempts({", ".join(ATTEMPT_COLUMNS)})
+        VALUES ({", ".join("?" * len(ATTEMPT_COLUMNS))})""",
+        attempts,
+    )
+    conn.commit()
+
+
+def iter_attempts(conn):
+    """Yield every attempt row, as ATTEMPT_COLUMNS, in the order recorded"""
+    yield from conn.execute(
+        f"SELECT {', '.join(ATTEMPT_COLUMNS)} FROM attempts ORDER BY id"
+    )
+
+
+def get_list_attempt_stats(conn, list_id):
+    """Get the AttemptStats of a list from its rollup"""
+    row = conn.execute(
+        f"SELECT {STATS_SELECT} FROM listStats WHERE listId = ?", (list_id,)
+    ).fetchone()
+    return AttemptStats(*row) if row else AttemptStats()
+
+
+def get_sentence_attempt_stats(conn, list_id, position):
+    """Get the AttemptStats of one sentence of a list from its rollup"""
+    row = conn.execute(
+        f"""SELECT {STATS_SELECT} FROM sentenceStats
+        WHERE listId = ? AND position = ?""",
+        (list_id, position),
+    ).fetchone()
+    return AttemptStats(*row) if row else AttemptStats()
+
+
+def get_daily_attempt_stats(conn, first_day="", last_day="9999-12-31"):
+    """Get (day, AttemptStats) for each day practiced in a range, in order"""
+    rows = conn.execute(
+        f"""SELECT day, {STATS_SELECT} FROM dayStats
+        WHERE day BETWEEN ? AND ? ORDER BY day""",
+        (first_day, last_day),
+    )
+    return [(day, AttemptStats(*values)) for day, *values in rows]
+
+
+def create_stats_tables(conn):
+    """Create per-list, per-sentence and per-day rollups of the attempts
+
+    A trigger on attempts updates all three in the same transaction as the
+    attempts are written, so statistics are read without scanning the
+    history. Existing history is rolled up once here.
+    """
+    columns = ", ".join(
+        f"{column} INTEGER NOT NULL DEFAULT 0" for column in STATS_COLUMNS
+    )
+    conn.execute(
+        f"""CREATE TABLE IF NOT EXISTS listStats (
+            listId INTEGER PRIMARY KEY, {columns}
+        )"""
+    )
+    conn.execute(
+        f"""CREATE TABLE IF NOT EXISTS sentenceStats (
+            listId INTEGER NOT NULL, position INTEGER NOT NULL, {columns},
+            PRIMARY KEY (listId, position)
+        ) WITHOUT ROWID"""
+    )
+    conn.execute(
+        f"""CREATE TABLE IF NOT EXISTS dayStats (
+            day TEXT PRIMARY KEY, {columns}
+        ) WITHOUT ROWID"""
+    )
+
+    totals = {table: {} for table in STATS_KEYS}
+    for list_id, position, day, exposure_ms, correct in conn.execute(
+        "SELECT listId, position, day, exposureMs, correct FROM attempts ORDER BY id"
+    ):
+        for table, key in (
+            ("listStats", (list_id,)),
+            ("sentenceStats", (list_id, position)),
+            ("dayStats", (day,)),
+        ):
+            totals[table].setdefault(key, AttemptStats()).add(correct, exposure_ms)
+    for table, keys in STATS_KEYS.items():
+        names = ", ".join(keys + STATS_COLUMNS)
+        placeholders = ", ".join("?" * (len(keys) + len(STATS_COLUMNS)))
+        conn.executemany(
+            f"INSERT INTO {table}({names}) VALUES ({placeholders})",
+            (key + stats.as_row() for key, stats in totals[table].items()),
+        )
+
+    upserts = "\n".join(
+        stats_upsert(table, keys) for table, keys in STATS_KEYS.items()
+    )
+    conn.execute(
+        f"""CREATE TRIGGER IF NOT EXISTS attemptsStats
+        AFTER INSERT ON attempts BEGIN
+            {upserts}
+        END"""
+    )
+
+
+def stats_upsert(table, keys):
+    """Statement adding the attempt new to its row of a rollup table"""
+    values = ", ".join(f"new.{key}" for key in keys)
+    streak = "CASE WHEN excluded.correct THEN streak + 1 ELSE 0 END"
+    return f"""INSERT INTO {table}({", ".join(keys + STATS_COLUMNS)})
+            VALUES ({values}, 1, new.correct, COALESCE(new.exposureMs, 0),
+                new.exposureMs IS NOT NULL, new.correct, new.correct)
+            ON CONFLICT({", ".join(keys)}) DO UPDATE SET
+                attempts = attempts + 1,
+                correct = correct + excluded.correct,
+                exposureMs = exposureMs + excluded.exposureMs,
+                exposures = exposures + excluded.exposures,
+                streak = {streak},
+                bestStreak = MAX(bestStreak, {streak});"""
+
+
+def create_transfer_tables(conn):
+    """Create the progress of imported exports, so stopped imports can resume"""
+    conn.execute(
+        """CREATE TABLE IF NOT EXISTS transfers (
+            exportId TEXT PRIMARY KEY,
+            line INTEGER NOT NULL DEFAULT 0,
+            done INTEGER NOT NULL DEFAULT 0
+        )"""
+    )
+    # Ids given to the lists of an export, and whether they were already stored
+    conn.execute(
+        """CREATE TABLE IF NOT EXISTS transferLists (
+            exportId TEXT NOT NULL,
+            oldId INTEGER NOT NULL,
+            newId INTEGER NOT NULL,
+            existing INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (exportId, oldId)
+        ) WITHOUT ROWID"""
+    )
+
+
+def get_transfer(conn, export_id):
+    """Get (lines imported, done) of an export, or None if never imported"""
+    return conn.execute(
+        "SELECT line, done FROM transfers WHERE exportId = ?", (export_id,)
+    ).fetchone()
+
+
+def set_transfer(conn, export_id, line, done=False):
+    """Record how many lines of an export have been imported"""
+    conn.execute(
+        """INSERT INTO transfers(exportId, line, done) VALUES (?, ?, ?)
+        ON CONFLICT(exportId) DO UPDATE SET
+            line = excluded.line, done = excluded.done""",
+        (export_id, line, int(done)),
+    )
+    conn.commit()
+
+
+def get_transfer_lists(conn, export_id):
+    """Get {old list id: (new list id, existing)} of an export being imported"""
+    return {
+        old_id: (new_id, bool(existing))
+        for old_id, new_id, existing in conn.execute(
+            """SELECT oldId, newId, existing FROM transferLists
+            WHERE exportId = ?""",
+            (export_id,),
+        )
+    }
+
+
+def add_transfer_list(conn, export_id, old_id, new_id, existing):
+    """Record the id an exported list was imported as"""
+    conn.execute(
+        """INSERT INTO transferLists(exportId, oldId, newId, existing)
+        VALUES (?, ?, ?, ?)""",
+        (export_id, old_id, new_id, int(existing)),
+    )
+
+
+def create_reviews_table(conn):
+    """Create the spaced-repetition state of reviewed sentences"""
+    conn.execute(
+        """CREATE TABLE IF NOT EXISTS reviews (
+            listId INTEGER NOT NULL,
+            position INTEGER NOT NULL,
+            ease REAL NOT NULL,
+            interval INTEGER NOT NULL,
+            repetitions INTEGER NOT NULL,
+            due REAL NOT NULL,
+            PRIMARY KEY (listId, position)
+        )"""
+    )
+    conn.execute("CREATE INDEX IF NOT EXISTS reviewsDue ON reviews(listId, due)")
+
+
+def get_reviews(conn, list_id):
+    """Get (position, ease, interval, repetitions, due) of a list's reviews"""
+    return conn.execute(
+        """SELECT position, ease, interval, repetitions, due
+        FROM reviews WHERE listId = ?""",
+        (list_id,),
+    ).fetchall()
+
+
+def iter_reviews(conn, list_id):
+    """Yield (position, ease, interval, repetitions, due) of a list's reviews"""
+    yield from conn.execute(
+        """SELECT position, ease, interval, repetitions, due
+        FROM reviews WHERE listId = ? ORDER BY position""",
+        (list_id,),
+    )
+
+
+def save_reviews(conn, reviews):
+    """Insert or replace review rows, as produced by ReviewState.as_row"""
+    conn.executemany(
+        """INSERT INTO reviews(listId, position, ease, interval, repetitions, due)
+        VALUES (?, ?, ?, ?, ?, ?)
+        ON CONFLICT(listId, position) DO UPDATE SET ease = excluded.ease,
+            interval = excluded.interval, repetitions = excluded.repetitions,
+            due = excluded.due""",
+        reviews,
+    )
     conn.commit()
 
 
 def create_users_table(conn):
     """Create table for users"""
     try:
-        sql = """CREATE TABLE users (
+        sql = """CREATE TABLE IF NOT EXISTS users (
             numCorrect Int,
             defaultPath String,
             timerDuration Int,
@@ -95,26 +1023,31 @@ def drop_users_table(conn):
 
 
 def get_all_users(conn):
-    """Get all users from table"""
+    """Get all users from table, columns ordered as in USER_COLUMNS"""
     cursor = conn.cursor()
-    cursor.execute("SELECT * FROM users")
+    cursor.execute(f"SELECT {', '.join(USER_COLUMNS.values())} FROM users")
     data = cursor.fetchall()
     return data
 
 
 def add_user(conn, user):
-    """Add a new user row in table"""
-    sql = """INSERT INTO users VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)"""
+    """Add a new user row in table, values ordered as in USER_COLUMNS"""
+    columns = list(USER_COLUMNS.values())[: len(user)]
+    sql = f"""INSERT INTO users({', '.join(columns)})
+        VALUES ({', '.join('?' * len(columns))})"""
     conn.execute(sql, user)
     conn.commit()
 
 
-def update_user(conn, user):
-    """Update a user within table"""
-    sql = """UPDATE users SET numCorrect = ?, defaultPath = ?, timerDuration = ?,
-        charTimerValue = ?, charBasedTimer = ?, noTyping = ?, autoStart = ?,
-        showCorrectAnswer = ?, darkMode = ?"""
-    conn.execute(sql, user)
+def update_user_fields(conn, changes):
+    """Update only the given user attributes, keyed as in USER_COLUMNS"""
+    if not changes:
+        return
+    names = sorted(changes)
+    assignments = ", ".join(f"{USER_COLUMNS[name]} = ?" for name in names)
+    conn.execute(
+        f"UPDATE users SET {assignments}", [changes[name] for name in names]
+    )
     conn.commit()
 
 
@@ -131,7 +1064,7 @@ def test_user(user_num):
 
 if __name__ == "__main__":
     connection = create_connection("data.db")
-    # drop_sentences_list_table(connection)
+    # drop_sentence_lists_table(connection)
     # drop_users_table(connection)
     # create_users_table(connection)
     # add_user(connection, test_user(3))
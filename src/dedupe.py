@@ -0,0 +1,125 @@
+"""Exact and near-duplicate detection for imported sentences"""
+import hashlib
+import re
+import struct
+from array import array
+from functools import lru_cache
+import scoring
+
+BANDS = 8  # LSH bands stored per sentence
+ROWS = 4  # MinHash values per band
+MIN_WORDS = 4  # Shorter sentences only match if they have the same words
+CANDIDATES_PER_BAND = 6  # Earlier sentences sharing a band compared per sentence
+WORD = re.compile(r"\w+")
+LANES = struct.Struct(f"<{BANDS * ROWS}H")  # 16-bit MinHash values
+BUCKETS = struct.Struct(f"<{BANDS}Q")  # The same values read as one per band
+BUCKET_MASK = (1 << 63) - 1  # Keeps bucket numbers within SQLite integers
+LINE_SLOTS = 1 << 10  # Initial slots of a LineSet, a power of two
+
+
+def line_key(line):
+    """Nonzero 64-bit digest of a line, as stored in a LineSet"""
+    digest = hashlib.blake2b(line.encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "little") or 1
+
+
+class LineSet:
+    """Set of line keys in a single open-addressed array of 8-byte slots
+
+    The table is kept between a quarter and half full, so it takes 16 to
+    32 bytes per key, briefly up to 48 while it doubles, with no per-key
+    Python objects. Zero marks an empty slot.
+    """
+
+    __slots__ = ("slots", "mask", "count")
+
+    def __init__(self, capacity=LINE_SLOTS):
+        self.slots = array("Q", [0]) * capacity
+        self.mask = capacity - 1
+        self.count = 0
+
+    def add(self, key):
+        """Add a nonzero key; returns False if it was already in the set"""
+        slots = self.slots
+        mask = self.mask
+        index = key & mask
+        while slots[index]:
+            if slots[index] == key:
+                return False
+            index = (index + 1) & mask
+        slots[index] = key
+        self.count += 1
+        if 2 * self.count > len(slots):
+            self.grow()
+        return True
+
+    def grow(self):
+        """Move the keys into a table twice the size"""
+        old_slots = self.slots
+        slots = self.slots = array("Q", [0]) * (2 * len(old_slots))
+        mask = self.mask = len(slots) - 1
+        for key in old_slots:
+            if key:
+                index = key & mask
+                while slots[index]:
+                    index = (index + 1) & mask
+                slots[index] = key
+
+
+def unique_lines(lines):
+    """Yield lines, dropping exact repeats of a line seen before"""
+    seen = LineSet()
+    for line in lines:
+        if seen.add(line_key(line)):
+            yield line
+
+
+def sentence_words(text):
+    """Words of a sentence ignoring case, punctuation and typographic variants"""
+    return tuple(WORD.findall(scoring.normalize(text).casefold()))
+
+
+@lru_cache(maxsize=1 << 16)
+def word_hashes(word):
+    """BANDS * ROWS independent 16-bit hashes of a word, from one digest"""
+    digest = hashlib.blake2b(word.encode("utf-8"), digest_size=LANES.size)
+    return LANES.unpack(digest.digest())
+
+
+def signature(words):
+    """LSH band buckets of the MinHash signature of a set of words
+
+    Each 16-bit lane of a word's digest acts as one hash function, and the
+    signature keeps each lane's minimum over the words. Sentences whose
+    word sets have Jaccard similarity s share at least one band with
+    probability 1 - (1 - s ** ROWS) ** BANDS. Returns None without words.
+    """
+    if not words:
+        return None
+    minimums = LANES.pack(*map(min, zip(*map(word_hashes, set(words)))))
+    return tuple(bucket & BUCKET_MASK for bucket in BUCKETS.unpack(minimums))
+
+
+def is_near_duplicate(words, other_words):
+    """Whether two sentences have the same words or differ by one word edit
+
+    One edit leaves the words after the first difference equal once the
+    edited word is skipped, so this takes one linear scan instead of an
+    edit distance computation.
+    """
+    if words == other_words:
+        return True
+    if min(len(words), len(other_words)) < MIN_WORDS:
+        return False
+    if len(words) > len(other_words):
+        words, other_words = other_words, words
+    if len(other_words) - len(words) > 1:
+        return False
+    prefix = 0
+    for word, other_word in zip(words, other_words):
+        if word != other_word:
+            break
+        prefix += 1
+    if len(words) == len(other_words):
+        return words[prefix + 1 :] == other_words[prefix + 1 :]
+    return words[prefix:] == other_words[prefix + 1 :]
@@ -0,0 +1,495 @@
+"""Qt-free drill session: picking sentences, grading answers and saving progress"""
+import os
+import time
+import weakref
+from contextlib import contextmanager
+from datetime import date, timedelta
+from functools import partial
+import db
+import pack
+import scoring
+from attempts import AttemptLog
+from controller import Controller
+from models import SentenceList, User
+from sampler import RANDOM
+from length_index import CHARS
+from scheduler import CORRECT_QUALITY, INCORRECT_QUALITY
+from title_index import TitleIndex, MAX_RESULTS
+from timing import SentenceTiming
+from keystrokes import KeystrokeBuffer, INSERT, DELETE
+
+DEFAULT_SENTENCES = "../default_sentences.txt"
+SEARCH_DRILL_LIMIT = 10000  # Most search hits gathered into one drill
+STATS_DAYS = 14  # Days of practice summarised by daily_stats
+TYPING = "typing"
+NO_TYPING = "no_typing"
+# Changes to Engine.sentence_lists reported to list watchers
+LISTS_INSERTED = "inserted"
+LISTS_REMOVED = "removed"
+LISTS_RESET = "reset"
+
+
+class Engine:
+    """Drill session of the user over the sentence lists stored in a database
+
+    Everything the main window does besides drawing widgets lives here, so
+    drills can be scripted, tested and benchmarked without importing PyQt5.
+    """
+
+    def __init__(self, database, clock=time.perf_counter_ns, load_lists=True):
+        self.database = database  # db.ConnectionManager
+        self.connection = database.connect()
+        self.clock = clock
+        self.user = get_user_from_db(self.connection)
+        self.controller = Controller([], self.connection)
+        self.title_index = TitleIndex()
+        # Objects told about changes to sentence_lists, e.g. Qt models over them
+        self.list_watchers = weakref.WeakSet()
+        if load_lists:
+            self.load_lists()
+        self.attempt_log = AttemptLog(self.connection)
+        self.timing = None  # SentenceTiming of the latest sentence
+        self.keystrokes = KeystrokeBuffer()  # Keys typed for the active sentence
+        self.keystroke_summary = None  # KeystrokeSummary of the latest answer
+
+    def load_lists(self):
+        """Read the saved sentence lists and start with the first one
+
+        The main window calls this after its first paint, since an empty
+        database first has the default sentences imported.
+        """
+        sentence_lists = get_lists_from_db(self.connection)
+        with self.changing_lists(LISTS_RESET):
+            self.controller.sentence_lists = sentence_lists
+        self.controller.get_start_list()
+        self.title_index = TitleIndex(self.controller.sentence_lists)
+
+    @contextmanager
+    def changing_lists(self, change, row=None):
+        """Tell list watchers about a change made to sentence_lists in the block
+
+        Watchers get lists_changing(change, row) before the change and
+        lists_changed(change, row) after it, where row is the position of the
+        list inserted or removed, and None when every list is replaced.
+        """
+        for watcher in list(self.list_watchers):
+            watcher.lists_changing(change, row)
+        try:
+            yield
+        finally:
+            for watcher in list(self.list_watchers):
+                watcher.lists_changed(change, row)
+
+    @property
+    def sentence_lists(self):
+        """Sentence lists available to the user"""
+        return self.controller.sentence_lists
+
+    @property
+    def current_list(self):
+        """List the sentences are currently drawn from"""
+        return self.controller.current_list
+
+    @property
+    def current_sentence(self):
+        """Sentence last shown to the user"""
+        return self.controller.current_sentence
+
+    @property
+    def sentence_active(self):
+        """Whether the sentence shown is still waiting for an answer"""
+        return self.controller.sentence_active
+
+    def next_sentence(self):
+        """Pick the next sentence of the current list and start its exposure
+
+        None is returned when the list is empty, no sentence passes the
+        user's length filter, or the list cannot be read; in the last case
+        the list's error says why.
+        """
+        current_list = self.controller.current_list
+        if not current_list or not current_list.size or current_list.error:
+            return None
+        try:
+            position = self.controller.next_position(
+                self.user.selection_mode, self.user.length_range()
+            )
+            if position is None:
+                return None
+            sentence = current_list.sentences[position]
+        except pack.PackError as err:
+            current_list.error = str(err)
+            return None
+
+        self.controller.current_sentence = sentence
+        self.controller.current_position = position
+        self.controller.sentence_active = True
+        self.timing = SentenceTiming(self.clock)
+        self.keystrokes.reset()
+        return sentence
+
+    def exposure_ms(self, sentence=None):
+        """Milliseconds a sentence stays visible under the user's timer settings"""
+        if sentence is None:
+            sentence = self.controller.current_sentence
+        if self.user.char_based_timer:
+            return len(sentence) * self.user.char_timer_value
+        return self.user.timer_duration * 1000
+
+    def sentence_shown(self):
+        """Note that the active sentence has been painted and is now visible"""
+        if self.controller.sentence_active:
+            self.timing.mark_shown()
+
+    def key_pressed(self, deleted=False):
+        """Record a key typed into the answer while a sentence is active"""
+        if self.controller.sentence_active:
+            self.keystrokes.record(self.clock(), DELETE if deleted else INSERT)
+
+    def hide_sentence(self):
+        """Note that the active sentence has been painted over"""
+        if self.controller.sentence_active:
+            self.timing.mark_hidden()
+
+    def check_answer(self, answer):
+        """Grade a typed answer to the active sentence and return its Score"""
+        self.timing.mark_answered()
+        self.keystroke_summary = self.keystrokes.summarize(
+            self.timing.shown_ns, len(answer)
+        )
+        score = scoring.score_answer(self.controller.current_sentence, answer)
+        self.complete_sentence(
+            score.is_correct, answer, score.quality(), score.char_accuracy
+        )
+        return score
+
+    def mark_answer(self, correct):
+        """Grade an answer the user judged themselves in no-typing mode"""
+        self.keystroke_summary = None
+        self.complete_sentence(correct)
+
+    def complete_sentence(self, correct, answer=None, quality=None, accuracy=None):
+        """Update counters, log the attempt and end the active sentence"""
+        self.timing.mark_answered()
+        current_list = self.controller.current_list
+        current_list.num_completed += 1
+        if correct:
+            self.user.num_correct += 1
+            current_list.num_correct += 1
+        self.record_attempt(correct, answer, quality, accuracy)
+        self.controller.sentence_active = False
+
+    def record_attempt(self, correct, answer=None, quality=None, accuracy=None):
+        """Log the answer to the current sentence and reschedule its review
+
+        quality is the SM-2 grade (0-5), by default derived from correct.
+        """
+        current_list = self.controller.current_list
+        if self.controller.current_position is None:
+            return
+        list_id, position = current_list.source(self.controller.current_position)
+        if list_id is None:
+            return
+
+        self.attempt_log.record(
+            list_id,
+            position,
+            NO_TYPING if self.user.no_typing else TYPING,
+            self.timing.exposure_ms,
+            answer,
+            correct,
+            accuracy,
+            self.timing.latency_ms,
+            self.keystroke_summary,
+        )
+        if quality is None:
+            quality = CORRECT_QUALITY if correct else INCORRECT_QUALITY
+        self.controller.grade(quality)
+
+    def list_stats(self, sentence_list=None):
+        """AttemptStats of a saved list, the current one by default
+
+        Read from the rollup, with attempts not yet written added on top.
+        Lists that are not saved have no stats and give None.
+        """
+        if sentence_list is None:
+            sentence_list = self.controller.current_list
+        if sentence_list is None or sentence_list.list_id is None:
+            return None
+        stats = db.get_list_attempt_stats(self.connection, sentence_list.list_id)
+        return self.attempt_log.pending_stats(stats, sentence_list.list_id)
+
+    def sentence_stats(self, list_id, position):
+        """AttemptStats of one stored sentence, including unwritten attempts"""
+        stats = db.get_sentence_attempt_stats(self.connection, list_id, position)
+        return self.attempt_log.pending_stats(stats, list_id, position)
+
+    def current_sentence_stats(self):
+        """AttemptStats of the sentence last shown, None if it is not stored"""
+        current_list = self.controller.current_list
+        if current_list is None or self.controller.current_position is None:
+            return None
+        list_id, position = current_list.source(self.controller.current_position)
+        if list_id is None:
+            return None
+        return self.sentence_stats(list_id, position)
+
+    def daily_stats(self, days=STATS_DAYS):
+        """(day, AttemptStats) of each day practised in the latest days, in order"""
+        self.attempt_log.flush()
+        first_day = (date.today() - timedelta(days=days - 1)).isoformat()
+        return db.get_daily_attempt_stats(self.connection, first_day)
+
+    def flush_if_full(self):
+        """Write buffered attempts once a whole batch is waiting"""
+        if self.attempt_log.is_full:
+            self.flush_history()
+
+    def flush_history(self):
+        """Write buffered attempts and review states to the database"""
+        self.attempt_log.flush()
+        self.controller.save_reviews()
+
+    def save_current_list(self):
+        """Add the current list to the database if it is new, otherwise update it"""
+        current_list = self.controller.current_list
+        if (
+            not current_list
+            or current_list.is_transient
+            or current_list in self.controller.deleted_lists
+        ):
+            return
+
+        if current_list.list_id is not None:
+            current_list.save(self.connection)
+        elif current_list.sentences and not self.is_saved_list(current_list):
+            current_list.list_id = db.add_sentence_list(
+                self.connection,
+                current_list.sentences,
+                current_list.title,
+                current_list.num_completed,
+                current_list.num_correct,
+            )
+            attach_loaders(self.connection, current_list)
+            current_list.mark_clean()
+
+    def is_saved_list(self, sentence_list):
+        """Check whether a list with the same sentences is already in the database"""
+        return db.find_sentence_list(self.connection, sentence_list.digest) is not None
+
+    def use_sentence_list(self, sentence_list):
+        """Make a list current, saving and unloading the previous one"""
+        self.flush_history()
+        self.save_current_list()
+        if self.controller.current_list not in (None, sentence_list):
+            self.controller.current_list.unload()
+        sentence_list.error = None  # Try reading it again, e.g. a restored pack
+        self.controller.current_list = sentence_list
+
+    def search_lists(self, query, limit=MAX_RESULTS):
+        """Lists whose title best matches a partly typed query, best first"""
+        return self.title_index.search(query, limit)
+
+    def search_sentences(self, text, missed_only=False, limit=-1):
+        """Get (list_id, title, position, sentence) of sentences matching a search
+
+        Best matches come first. missed_only keeps sentences answered
+        incorrectly at least once.
+        """
+        if missed_only:
+            self.attempt_log.flush()
+        return db.search_sentences(self.connection, text, missed_only, limit=limit)
+
+    def drill_search(self, text, missed_only=False):
+        """Drill the sentences matching a search, None if nothing matches
+
+        The hits form a transient list; attempts are logged against the
+        lists the sentences are stored in.
+        """
+        rows = self.search_sentences(text, missed_only, SEARCH_DRILL_LIMIT)
+        if not rows:
+            return None
+        prefix = "Missed" if missed_only else "Search"
+        sentence_list = SentenceList(
+            [row[3] for row in rows],
+            f"{prefix}: {text.strip()}",
+            sources=[(row[0], row[2]) for row in rows],
+        )
+        self.use_sentence_list(sentence_list)
+        return sentence_list
+
+    def find_list(self, list_id=None, title=None):
+        """Get the loaded list with the given id or title, None if there is none"""
+        for sentence_list in self.controller.sentence_lists:
+            if list_id is not None and sentence_list.list_id == list_id:
+                return sentence_list
+            if title is not None and sentence_list.title == title:
+                return sentence_list
+        return None
+
+    def add_sentence_list(self, sentence_list):
+        """Make a list available to the user"""
+        with self.changing_lists(LISTS_INSERTED, len(self.controller.sentence_lists)):
+            self.controller.sentence_lists.append(sentence_list)
+        self.title_index.add(sentence_list)
+
+    def load_sentence_list(self, list_id):
+        """Get a list saved by the importer, adding it if it is not known yet
+
+        Returns (sentence_list, is_new).
+        """
+        sentence_list = self.find_list(list_id)
+        if sentence_list is not None:
+            return sentence_list, False
+        sentence_list = sentence_list_from_row(
+            self.connection, db.get_sentence_list(self.connection, list_id)
+        )
+        self.add_sentence_list(sentence_list)
+        return sentence_list, True
+
+    def open_pack(self, path, title=None):
+        """Get the list reading a sentence pack, adding it if it is new
+
+        A list with the same sentences that is already stored is reused.
+        Returns None if the file is not a readable pack.
+        """
+        try:
+            digest, size = pack.read_header(path)
+        except (OSError, pack.PackError) as err:
+            print(err)
+            return None
+        list_id = db.find_sentence_list(self.connection, digest)
+        if list_id is None:
+            if title is None:
+                title = os.path.basename(path)
+            list_id = db.add_pack_list(
+                self.connection, title, os.path.abspath(path), digest, size
+            )
+        return self.load_sentence_list(list_id)[0]
+
+    def rename_sentence_list(self, sentence_list, title):
+        """Change the title of a list and save it"""
+        sentence_list.title = title
+        sentence_list.save(self.connection)
+        self.title_index.rename(sentence_list)
+
+    def delete_sentence_list(self, sentence_list):
+        """Delete a list and its history, switching away from it if it is current
+
+        Returns the list that became current, or None if no lists are left.
+        """
+        if sentence_list.list_id is not None:
+            self.flush_history()
+            db.delete_sentence_list(self.connection, sentence_list.list_id)
+        self.controller.deleted_lists.append(sentence_list)
+        row = self.controller.sentence_lists.index(sentence_list)
+        with self.changing_lists(LISTS_REMOVED, row):
+            del self.controller.sentence_lists[row]
+        self.title_index.remove(sentence_list)
+        if self.controller.current_list == sentence_list:
+            if self.controller.sentence_lists:
+                self.use_sentence_list(self.controller.sentence_lists[0])
+            else:
+                self.controller.current_list = None
+        return self.controller.current_list
+
+    def close(self):
+        """Save the session and close every database connection"""
+        with self.database.transaction():
+            self.flush_history()
+            self.user.save(self.connection)
+
+            # Add sentence list to database if it's not a duplicate and isn't empty
+            self.save_current_list()
+
+        self.database.close()
+
+
+def get_user_from_db(conn):
+    """Get main user settings and statistics from database"""
+    users = db.get_all_users(conn)
+    current_user = None
+
+    if not users:
+        current_user = User()
+        db.add_user(
+            conn,
+            [getattr(current_user, name) for name in db.USER_COLUMNS],
+        )
+    else:
+        # Get the first user (only one user is supported right now)
+        row = dict(zip(db.USER_COLUMNS, users[0]))
+        row["show_correct_sentence"] = bool(row["show_correct_sentence"])
+        row["dark_mode"] = bool(row["dark_mode"])
+        row["selection_mode"] = row["selection_mode"] or RANDOM
+        row["length_unit"] = row["length_unit"] or CHARS
+        current_user = User(**row)
+
+    return current_user
+
+
+def sentence_list_from_row(conn, row):
+    """Build a SentenceList from a metadata row, loading sentences on demand"""
+    (
+        list_id,
+        title,
+        num_completed,
+        num_correct,
+        digest,
+        size,
+        seed,
+        position,
+        pack_path,
+    ) = row
+    sentence_list = SentenceList(
+        None,
+        title,
+        num_completed,
+        num_correct,
+        list_id,
+        digest,
+        size,
+        deck_seed=seed,
+        deck_position=position,
+        pack_path=pack_path,
+    )
+    attach_loaders(conn, sentence_list)
+    return sentence_list
+
+
+def attach_loaders(conn, sentence_list):
+    """Let a saved list fetch its sentences and length index from the database
+
+    Lists of a sentence pack map the pack instead, and build their length
+    index from it when one is needed.
+    """
+    if sentence_list.pack_path is not None:
+        sentence_list.loader = partial(
+            pack.load_pack,
+            sentence_list.pack_path,
+            sentence_list.digest,
+            sentence_list.size,
+        )
+        sentence_list.length_loader = None
+        return
+    sentence_list.loader = partial(db.iter_sentences, conn, sentence_list.list_id)
+    sentence_list.length_loader = partial(
+        db.get_length_entries, conn, sentence_list.list_id
+    )
+    sentence_list.duplicate_loader = partial(
+        db.get_duplicate_positions, conn, sentence_list.list_id
+    )
+
+
+def get_lists_from_db(conn):
+    """Get sentence lists from database, deferring their sentences until used"""
+    all_sentence_lists = db.get_all_sentence_lists(conn)
+
+    if not all_sentence_lists and os.path.exists(DEFAULT_SENTENCES):
+        # Imported here, as only an empty database needs the importer
+        import importer
+
+        importer.import_text_file(conn, DEFAULT_SENTENCES, "Default")
+        all_sentence_lists = db.get_all_sentence_lists(conn)
+
+    return [sentence_list_from_row(conn, row) for row in all_sentence_lists]
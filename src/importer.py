@@ -0,0 +1,127 @@
+"""Streaming import of text files into the sentence list tables"""
+import codecs
+import hashlib
+import os
+import db
+from dedupe import unique_lines
+
+CHUNK_SIZE = 1 << 20  # Bytes read from the file at a time
+BATCH_SIZE = 5000  # Sentences written per transaction
+FLAG_BATCH_SIZE = 1000  # Sentences checked for near-duplicates per transaction
+
+
+class ImportCancelled(Exception):
+    """Raised when an import is cancelled before it finishes"""
+
+
+def iter_lines(file, chunk_size=CHUNK_SIZE, on_chunk=None):
+    """Yield decoded lines from a binary file read in fixed-size chunks
+
+    on_chunk is called with the number of bytes read so far after each chunk.
+    """
+    decoder = codecs.getincrementaldecoder("utf-8-sig")(errors="replace")
+    remainder = ""
+    bytes_read = 0
+    while True:
+        chunk = file.read(chunk_size)
+        if not chunk:
+            break
+        bytes_read += len(chunk)
+        lines = (remainder + decoder.decode(chunk)).split("\n")
+        remainder = lines.pop()
+        yield from lines
+        if on_chunk:
+            on_chunk(bytes_read)
+    remainder += decoder.decode(b"", final=True)
+    if remainder:
+        yield remainder
+
+
+def clean_lines(lines):
+    """Strip surrounding whitespace and drop lines that are left empty"""
+    for line in lines:
+        line = line.strip()
+        if line:
+            yield line
+
+
+def batched(items, size):
+    """Group an iterable into lists of at most size items"""
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def import_text_file(
+    conn,
+    path,
+    title=None,
+    batch_size=BATCH_SIZE,
+    progress=None,
+    is_cancelled=None,
+    flag_batch_size=FLAG_BATCH_SIZE,
+):
+    """Import a text file as a new sentence list and return its list id
+
+    Lines are written in batches, each committed in its own transaction, so
+    memory use stays bounded by the batch size plus 16 to 32 bytes per
+    distinct line, used to drop exact repeats. Near-duplicates of stored
+    sentences are kept but flagged in a second pass once every line is
+    stored, flag_batch_size sentences per transaction, so that neither pass
+    holds the write lock for long. progress is called with
+    (bytes_read, total_bytes) and is_cancelled is polled between batches;
+    a cancelled import removes its partial rows and raises ImportCancelled.
+    If an identical list is already stored, the new rows are discarded and
+    the id of the existing list is returned instead; None is returned when
+    the file holds no sentences.
+    """
+    if title is None:
+        title = os.path.basename(path)
+    total = os.path.getsize(path)
+
+    def on_chunk(bytes_read):
+        if progress:
+            progress(bytes_read, total)
+
+    list_id = db.insert_list(conn, title)
+    conn.commit()
+
+    hasher = hashlib.sha256()
+    size = 0
+    try:
+        with open(path, "rb") as file:
+            lines = clean_lines(iter_lines(file, on_chunk=on_chunk))
+            for batch in batched(unique_lines(lines), batch_size):
+                if is_cancelled and is_cancelled():
+                    raise ImportCancelled(path)
+                size += db.insert_sentences(conn, list_id, batch, size, hasher)
+                conn.commit()
+
+        digest = hasher.hexdigest()
+        existing_id = db.find_sentence_list(conn, digest) if size else None
+        if size and existing_id is None:
+            for start in range(0, size, flag_batch_size):
+                if is_cancelled and is_cancelled():
+                    raise ImportCancelled(path)
+                db.flag_near_duplicates(conn, list_id, start, start + flag_batch_size)
+                conn.commit()
+    except BaseException:
+        conn.rollback()
+        db.delete_sentence_list(conn, list_id)
+        raise
+
+    if not size:
+        db.delete_sentence_list(conn, list_id)
+        return None
+    if existing_id is not None:
+        db.delete_sentence_list(conn, list_id)
+        return existing_id
+
+    db.set_list_content(conn, list_id, digest, size)
+    conn.commit()
+    return list_id
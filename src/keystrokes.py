@@ -0,0 +1,96 @@
+"""Keystrokes of a typed answer, kept in a preallocated ring buffer"""
+import json
+from array import array
+from bisect import bisect_left
+from timing import NS_PER_MS
+
+CAPACITY = 512  # Keystrokes kept per answer; older ones are overwritten
+CHARS_PER_WORD = 5
+# Upper bounds in ms of the inter-key interval histogram buckets, then the rest
+INTERVAL_BUCKETS = (50, 100, 150, 200, 300, 500, 1000)
+INSERT = 0
+DELETE = 1
+
+
+class KeystrokeBuffer:
+    """Timestamps and kinds of the keys pressed while typing one answer
+
+    Both arrays are allocated once and written in place, so recording a key
+    only stores two numbers. Only the latest CAPACITY keys are kept for the
+    interval histogram; counts cover every key.
+    """
+
+    __slots__ = ("times", "kinds", "count", "deletes", "first_ns")
+
+    def __init__(self, capacity=CAPACITY):
+        self.times = array("q", bytes(8 * capacity))
+        self.kinds = array("b", bytes(capacity))
+        self.reset()
+
+    def reset(self):
+        """Forget the keys of the previous answer"""
+        self.count = 0
+        self.deletes = 0
+        self.first_ns = None
+
+    def record(self, timestamp_ns, kind=INSERT):
+        """Store one keystroke, overwriting the oldest when full"""
+        index = self.count % len(self.times)
+        self.times[index] = timestamp_ns
+        self.kinds[index] = kind
+        if self.count == 0:
+            self.first_ns = timestamp_ns
+        self.count += 1
+        if kind == DELETE:
+            self.deletes += 1
+
+    def recent_times(self):
+        """Timestamps of the keys still held, oldest first"""
+        capacity = len(self.times)
+        if self.count <= capacity:
+            return self.times[: self.count]
+        start = self.count % capacity
+        return self.times[start:] + self.times[:start]
+
+    def summarize(self, since_ns, answer_length):
+        """KeystrokeSummary of the answer, timing the first key from since_ns"""
+        if not self.count:
+            return KeystrokeSummary()
+        times = self.recent_times()
+        histogram = [0] * (len(INTERVAL_BUCKETS) + 1)
+        for previous, current in zip(times, times[1:]):
+            interval_ms = (current - previous) / NS_PER_MS
+            histogram[bisect_left(INTERVAL_BUCKETS, interval_ms)] += 1
+
+        typing_ns = times[-1] - self.first_ns
+        wpm = None
+        if typing_ns > 0:
+            minutes = typing_ns / NS_PER_MS / 60000
+            wpm = answer_length / CHARS_PER_WORD / minutes
+        return KeystrokeSummary(
+            self.count,
+            wpm,
+            tuple(histogram),
+            self.deletes / self.count,
+            round((self.first_ns - since_ns) / NS_PER_MS),
+        )
+
+
+class KeystrokeSummary:
+    """Typing speed and rhythm of one answer"""
+
+    __slots__ = ("keys", "wpm", "intervals", "backspace_rate", "first_key_ms")
+
+    def __init__(
+        self, keys=0, wpm=None, intervals=None, backspace_rate=None, first_key_ms=None
+    ):
+        self.keys = keys  # Keys pressed, including deletions
+        self.wpm = wpm  # Answer length in 5-character words per minute typing
+        self.intervals = intervals  # Counts per INTERVAL_BUCKETS bucket
+        self.backspace_rate = backspace_rate  # Share of keys that deleted text
+        self.first_key_ms = first_key_ms  # From showing the sentence to typing
+
+    def as_row(self):
+        """Values of the attempts keystroke columns"""
+        intervals = None if self.intervals is None else json.dumps(self.intervals)
+        return (self.keys, self.wpm, intervals, self.backspace_rate, self.first_key_ms)
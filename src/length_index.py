@@ -0,0 +1,66 @@
+"""Sentence positions of a list ordered by length, for range queries"""
+from array import array
+from bisect import bisect_left, bisect_right
+
+CHARS = "chars"
+WORDS = "words"
+UNITS = (CHARS, WORDS)
+
+
+def sentence_lengths(sentence):
+    """Get (characters, words) of a sentence, ignoring surrounding whitespace"""
+    sentence = sentence.strip()
+    return len(sentence), len(sentence.split())
+
+
+class LengthIndex:
+    """Positions of a list sorted by length, with prefix sums of characters
+
+    Any length range maps to one contiguous span found by binary search, so
+    counting, drawing uniformly and averaging character counts over a range
+    all take O(log n).
+    """
+
+    def __init__(self, entries):
+        """Build from (length, position, characters) tuples sorted by length"""
+        self.lengths = array("I")
+        self.positions = array("I")
+        self.char_sums = array("Q", [0])
+        total = 0
+        for length, position, chars in entries:
+            self.lengths.append(length)
+            self.positions.append(position)
+            total += chars
+            self.char_sums.append(total)
+
+    @classmethod
+    def from_sentences(cls, sentences, unit=CHARS):
+        """Build from sentences held in memory, e.g. of a list not yet saved"""
+        entries = []
+        for position, sentence in enumerate(sentences):
+            chars, words = sentence_lengths(sentence)
+            entries.append((chars if unit == CHARS else words, position, chars))
+        entries.sort()
+        return cls(entries)
+
+    def __len__(self):
+        return len(self.positions)
+
+    def span(self, min_length=0, max_length=None):
+        """Get the (start, stop) slice of sentences within the length range"""
+        start = bisect_left(self.lengths, min_length)
+        if max_length is None:
+            return start, len(self.lengths)
+        return start, max(start, bisect_right(self.lengths, max_length))
+
+    def count(self, min_length=0, max_length=None):
+        """Number of sentences within the length range"""
+        start, stop = self.span(min_length, max_length)
+        return stop - start
+
+    def mean_chars(self, min_length=0, max_length=None):
+        """Average number of characters of the sentences in the range"""
+        start, stop = self.span(min_length, max_length)
+        if start == stop:
+            return 0
+        return (self.char_sums[stop] - self.char_sums[start]) / (stop - start)
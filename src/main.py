@@ -1,10 +1,10 @@
 """App starting point with main window and fetching data from database"""
+from startup import StartupProfile
+from profiling import Profiler
 import sys
 import os
-import json
-import random
-from functools import partial
-from PyQt5.QtCore import Qt, QTimer
+import sqlite3
+from PyQt5.QtCore import Qt, QEvent, QTimer, QThread, pyqtSignal
 from PyQt5.QtWidgets import (
     QMainWindow,
     QWidget,
@@ -15,18 +15,20 @@ from PyQt5.QtWidgets import (
     QVBoxLayout,
     QAction,
     QFileDialog,
+    QProgressDialog,
     QApplication,
 )
 from PyQt5.QtGui import QPalette, QColor, QGuiApplication
 import db
-from settings import SettingsWindow
-from sentence_list import SentenceListWindow, SentenceList
-from controller import Controller
+import engine as engine_module
+import pack
+from engine import Engine
+
+DB_FILE = "data.db"
 
 """
 To Do:
 - Refactor code + organize
-- Customize valid sentences when generating a sentence (e.g. <50 chars)
 - Fix switching from dark mode to light mode
 - Fix switching between lists when in no-typing mode and no answer inputted
 """
@@ -35,19 +37,23 @@ To Do:
 class MainWindow(QMainWindow):
     """Main application window"""
 
-    def __init__(self, user=None, controller=None):
+    def __init__(self, engine, startup_profile=None, profiler=None):
         super().__init__()
 
-        self.user = user
-        self.controller = controller
+        self.engine = engine
+        self.startup_profile = startup_profile or StartupProfile()
+        self.profiler = profiler or Profiler()
+        self.painted = False  # Lists are loaded after the first paint
+        self.user = engine.user
+        self.controller = engine.controller
+        self.database = engine.database
+        self.default_palette = QGuiApplication.palette()
 
         self.set_dark_mode(self.user.dark_mode)
 
         self.window = QWidget(self)
         self.setCentralWidget(self.window)
 
-        self.menu_actions = []
-
         self.create_menu_bar()  # Set up menu bar
         self.create_info_line()  # Set up info line
 
@@ -59,9 +65,11 @@ class MainWindow(QMainWindow):
 
         self.input_box = QLineEdit("", self)
         self.input_box.returnPressed.connect(self.check_answer)
+        self.input_box.installEventFilter(self)
 
         self.generate_sentence_btn = QPushButton("Generate Sentence", self)
-        self.generate_sentence_btn.clicked.connect(self.get_random_sentence)
+        # Dropping clicked's argument keeps profiled wrappers from being passed it
+        self.generate_sentence_btn.clicked.connect(lambda: self.get_random_sentence())
 
         self.correct_answer_label = QLabel("")
         self.correct_answer_label.setAlignment(Qt.AlignCenter)
@@ -93,6 +101,8 @@ class MainWindow(QMainWindow):
         self.no_typing_mode()
 
         self.resp_timer = QTimer()
+        # Coarse timers may fire up to 5% late, which is tens of milliseconds
+        self.resp_timer.setTimerType(Qt.PreciseTimer)
         self.resp_timer.timeout.connect(self.clear_sentence)
 
         self.answer_timer = QTimer()
@@ -113,13 +123,21 @@ class MainWindow(QMainWindow):
         self.sentence_settings_act = QAction("Settings", self)
         self.sentence_settings_act.triggered.connect(self.open_list_settings)
         self.sentence_menu.addAction(self.sentence_settings_act)
-        for sentence_list in self.controller.sentence_lists:
-            self.sentence_act = QAction(f"{sentence_list.title}")
-            self.sentence_act.triggered.connect(
-                partial(self.use_sentence_list, sentence_list)
-            )
-            self.menu_actions.append(self.sentence_act)
-            self.sentence_menu.addAction(self.sentence_act)
+
+        self.switch_list_act = QAction("Switch...", self)
+        self.switch_list_act.setStatusTip("Find a list by its title")
+        self.switch_list_act.triggered.connect(self.open_switcher)
+        self.sentence_menu.addAction(self.switch_list_act)
+
+        self.search_act = QAction("Search Sentences", self)
+        self.search_act.setStatusTip("Find sentences in every list and drill them")
+        self.search_act.triggered.connect(self.open_search)
+        self.sentence_menu.addAction(self.search_act)
+
+        self.stats_act = QAction("Statistics", self)
+        self.stats_act.setStatusTip("Attempts at the current list and sentence by day")
+        self.stats_act.triggered.connect(self.open_stats)
+        self.sentence_menu.addAction(self.stats_act)
 
         # Settings Menu
         self.settings_act = QAction("Settings", self)
@@ -136,9 +154,7 @@ class MainWindow(QMainWindow):
         self.current_list_label.setAlignment(Qt.AlignLeft)
 
         # Label for number of correct answers in list
-        self.num_list_correct_label = QLabel(
-            f"List Correct: {str(self.controller.current_list.num_correct)}"
-        )
+        self.num_list_correct_label = QLabel(self.list_score_text())
         self.num_list_correct_label.setAlignment(Qt.AlignRight)
 
         # Main info layout that contains the single label and inner layout
@@ -151,6 +167,8 @@ class MainWindow(QMainWindow):
         action_shortcuts = [
             ("Ctrl+O", self.open_file_act),
             ("Ctrl+L", self.sentence_settings_act),
+            ("Ctrl+P", self.switch_list_act),
+            ("Ctrl+F", self.search_act),
             ("Ctrl+S", self.settings_act),
             ("Z", self.correct_btn),
             ("X", self.incorrect_btn),
@@ -165,141 +183,137 @@ class MainWindow(QMainWindow):
         """
         Override the closeEvent PyQt function to update the database before closing application.
         """
-        db.update_user(
-            connection,
-            [
-                self.user.num_correct,
-                self.user.default_path,
-                self.user.timer_duration,
-                self.user.char_timer_value,
-                self.user.char_based_timer,
-                self.user.no_typing,
-                self.user.auto_start,
-                self.user.show_correct_sentence,
-                self.user.dark_mode,
-            ],
-        )
-
-        # Add sentence list to database if it's not a duplicate and isn't empty
-        if self.controller.current_list:
-            all_sentence_lists = db.get_all_sentence_lists(connection)
-            duplicates = [
-                self.controller.current_list.sentences
-                == json.loads("".join(sentence_list[0]))
-                for sentence_list in all_sentence_lists
-            ]
-            if (
-                True not in duplicates
-                and self.controller.current_list.sentences
-                and self.controller.current_list not in self.controller.deleted_lists
-            ):
-                db.add_sentence_list(
-                    connection,
-                    json.dumps(self.controller.current_list.sentences),
-                    self.controller.current_list.title,
-                    self.controller.current_list.num_completed,
-                    self.controller.current_list.num_correct,
-                )
-            else:
-                db.update_sentence_list(
-                    connection,
-                    json.dumps(self.controller.current_list.sentences),
-                    self.controller.current_list.title,
-                    self.controller.current_list.num_completed,
-                    self.controller.current_list.num_correct,
-                )
-
-        connection.close()
+        self.engine.close()
         self.close()
 
     def use_sentence_list(self, sentence_list):
         """Update the current sentence list and related labels"""
-        db.update_sentence_list(
-            connection,
-            json.dumps(self.controller.current_list.sentences),
-            self.controller.current_list.title,
-            self.controller.current_list.num_completed,
-            self.controller.current_list.num_correct,
-        )
-        self.controller.current_list = sentence_list
+        self.engine.use_sentence_list(sentence_list)
+        self.show_current_list()
+
+    def paintEvent(self, event):
+        """Finish starting up once the window is on screen"""
+        super().paintEvent(event)
+        if not self.painted:
+            self.painted = True
+            self.startup_profile.mark("first paint")
+            QTimer.singleShot(0, self.finish_startup)
+
+    def finish_startup(self):
+        """Load the sentence lists and show the current one"""
+        self.engine.load_lists()
+        self.startup_profile.mark("lists loaded")
+        self.update_list_labels()
+        self.startup_profile.mark("labels updated")
+        self.startup_profile.report()
+
+    def list_score_text(self):
+        """Correct answers in the current list, with the running streak"""
+        text = f"List Correct: {self.controller.current_list.num_correct}"
+        stats = self.engine.list_stats()
+        if stats is not None and stats.streak > 1:
+            text += f" (streak: {stats.streak})"
+        return text
+
+    def update_list_labels(self):
+        """Show the title and score of the current list"""
         self.current_list_label.setText(
             f"Current List: {self.controller.current_list.title}"
         )
-        self.num_list_correct_label.setText(
-            f"List Correct: {self.controller.current_list.num_correct}"
-        )
+        self.num_list_correct_label.setText(self.list_score_text())
+
+    def show_current_list(self):
+        """Show the title and score of the current list and reset the sentence"""
+        self.update_list_labels()
         self.clear_sentence()
         self.clear_answer(False)
 
     def open_settings(self):
         """Open settings window"""
+        from settings import SettingsWindow
+
         self.settings_window = SettingsWindow(self, self.user)
         self.settings_window.show()
 
     def open_list_settings(self):
         """Open sentence list window"""
+        from sentence_list import SentenceListWindow
+
         self.sentence_list_window = SentenceListWindow(self)
         self.sentence_list_window.show()
 
-    def add_sentence_list(self):
-        self.sentence_act = QAction(f"{self.controller.current_list.title}")
-        self.sentence_act.triggered.connect(
-            partial(self.use_sentence_list, self.controller.current_list)
-        )
-        self.menu_actions.append(self.sentence_act)
-        self.sentence_menu.addAction(self.sentence_act)
-        self.controller.sentence_lists.append(self.controller.current_list)
+    def open_search(self):
+        """Open the sentence search window"""
+        from search import SearchWindow
+
+        self.search_window = SearchWindow(self)
+        self.search_window.show()
+
+    def open_stats(self):
+        """Open the practice statistics window"""
+        from stats_window import StatsWindow
+
+        self.stats_window = StatsWindow(self)
+        self.stats_window.show()
+
+    def open_switcher(self):
+        """Open the quick-switcher to find a list by title"""
+        from switcher import QuickSwitcher
+
+        self.switcher = QuickSwitcher(self)
+        self.switcher.show()
 
     def open_file(self):
-        """Open a text file and extract the lines as sentences"""
+        """Open a text file and import its lines as sentences, or a sentence pack"""
         fname = QFileDialog().getOpenFileName(
-            self, "Open file", self.user.default_path, "Text Files (*.txt)"
+            self,
+            "Open file",
+            self.user.default_path,
+            f"Text Files (*.txt);;Sentence Packs (*{pack.PACK_SUFFIX})",
         )
 
         if fname[0]:
             # Add sentence list to database if it's not a duplicate and isn't empty
-            all_sentence_lists = db.get_all_sentence_lists(connection)
-            duplicates = [
-                self.controller.current_list.sentences
-                == json.loads("".join(sentence_list[0]))
-                for sentence_list in all_sentence_lists
-            ]
-            if True not in duplicates and self.controller.current_list:
-                db.add_sentence_list(
-                    connection,
-                    json.dumps(self.controller.current_list.sentences),
-                    self.controller.current_list.title,
-                    self.controller.current_list.num_completed,
-                    self.controller.current_list.num_correct,
-                )
+            self.engine.save_current_list()
+
+            title = os.path.basename(fname[0])
+            sentence_list = self.engine.find_list(title=title)
+            if sentence_list is None and fname[0].endswith(pack.PACK_SUFFIX):
+                sentence_list = self.engine.open_pack(fname[0], title)
+                if sentence_list is None:
+                    return
+            if sentence_list is not None:
+                self.use_sentence_list(sentence_list)
+            else:
+                self.start_import(fname[0], title)
 
-            with open(fname[0], "r") as file:
-                duplicates = [
-                    os.path.basename(fname[0]) == sentence_list.title
-                    for sentence_list in self.controller.sentence_lists
-                ]
-                if sum(duplicates) <= 1 in duplicates:
-                    self.controller.current_list = next(
-                        (
-                            sentence_list
-                            for sentence_list in self.controller.sentence_lists
-                            if os.path.basename(fname[0]) == sentence_list.title
-                        ),
-                        None,
-                    )
-                else:
-                    self.controller.current_list = SentenceList(
-                        file.readlines(), os.path.basename(fname[0])
-                    )
-                    self.add_sentence_list()
-
-                self.current_list_label.setText(
-                    f"Current List: {self.controller.current_list.title}"
-                )
-                self.num_list_correct_label.setText(
-                    f"List Correct: {self.controller.current_list.num_correct}"
-                )
-                self.clear_answer(False)
+    def start_import(self, path, title):
+        """Import a text file on a worker thread while showing progress"""
+        self.import_thread = ImportThread(self.database, path, title)
+        self.import_dialog = QProgressDialog(
+            f"Importing {title}...", "Cancel", 0, 100, self
+        )
+        self.import_dialog.setWindowModality(Qt.WindowModal)
+        self.import_dialog.canceled.connect(self.import_thread.cancel)
+        self.import_thread.progress.connect(self.import_dialog.setValue)
+        self.import_thread.imported.connect(self.import_finished)
+        self.import_thread.failed.connect(self.import_failed)
+        self.import_thread.cancelled.connect(self.import_dialog.reset)
+        self.import_thread.start()
+
+    def import_finished(self, list_id):
+        """Switch to a list once the worker thread has imported it"""
+        self.import_dialog.reset()
+        if list_id < 0:
+            return
+
+        sentence_list, _ = self.engine.load_sentence_list(list_id)
+        self.use_sentence_list(sentence_list)
+
+    def import_failed(self, message):
+        """Report an import that stopped with an error"""
+        self.import_dialog.reset()
+        print(message)
 
     def prep_display_sentence(self):
         """Setting up main window to display sentence"""
@@ -310,45 +324,56 @@ class MainWindow(QMainWindow):
 
     def get_random_sentence(self):
         """Generate a random sentence from the current sentence list."""
+        started = self.profiler.clock()
         self.prep_display_sentence()
-        if self.controller.current_list:
-            self.new_sentence = random.choice(
-                self.controller.current_list.sentences
-            ).rstrip()
-
-            # Generate a new sentence until it is different than the previous (unless size is 1)
-            while (
-                self.new_sentence == self.controller.current_sentence
-                and len(self.controller.current_list.sentences) != 1
-            ):
-                self.new_sentence = random.choice(
-                    self.controller.current_list.sentences
-                ).rstrip()
+        if self.controller.current_list and self.controller.current_list.size:
+            # Picked by the list's sampler, or the review scheduler in review mode
+            self.new_sentence = self.engine.next_sentence()
+            if self.new_sentence is None:
+                error = self.controller.current_list.error
+                self.sentence_label.setText(
+                    f"This list cannot be read: {error}"
+                    if error
+                    else "No sentences match the length filter."
+                )
+                return
 
             self.sentence_label.setText(self.new_sentence)
-            self.controller.current_sentence = self.new_sentence
-            self.controller.sentence_active = True
             self.input_box.setFocus()
-            if self.user.char_based_timer:
-                self.resp_timer.start(
-                    len(self.new_sentence) * self.user.char_timer_value
-                )
-            else:
-                self.resp_timer.start(self.user.timer_duration * 1000)
+            # Paint now so the exposure is timed from when the sentence is visible
+            self.sentence_label.repaint()
+            self.profiler.record("paint.sentence_shown", started)
+            self.engine.sentence_shown()
+            self.resp_timer.start(self.engine.exposure_ms(self.new_sentence))
+
+    def eventFilter(self, watched, event):
+        """Report keys typed into the answer box to the engine for timing"""
+        if watched is self.input_box and event.type() == QEvent.KeyPress:
+            key = event.key()
+            if key in (Qt.Key_Backspace, Qt.Key_Delete):
+                self.engine.key_pressed(deleted=True)
+            elif key < Qt.Key_Escape and not event.modifiers() & Qt.ControlModifier:
+                # Keys with codes below Escape's are the ones that type text
+                self.engine.key_pressed()
+        return super().eventFilter(watched, event)
 
     def clear_sentence(self):
         """Hide the current sentence"""
-        if user.no_typing:
+        started = self.profiler.clock()
+        self.resp_timer.stop()
+        if self.user.no_typing:
             self.show_answer_btn.show()
             self.sentence_label.setText("Was your answer correct or incorrect?")
         else:
             self.sentence_label.setText("Type the sentence and hit Enter.")
-        self.resp_timer.stop()
+        self.sentence_label.repaint()
+        self.profiler.record("paint.sentence_hidden", started)
+        self.engine.hide_sentence()
 
     def show_answer(self):
         """Show the sentence answer to the user"""
         if self.correct_answer_label.text() == "":
-            self.correct_answer_label.setText(self.controller.current_sentence.rstrip())
+            self.correct_answer_label.setText(self.controller.current_sentence)
         else:
             self.correct_answer_label.setText("")
 
@@ -371,7 +396,7 @@ class MainWindow(QMainWindow):
 
         self.show_answer_btn.hide()
         if self.controller.sentence_active:
-            self.controller.current_list.num_completed += 1
+            self.engine.mark_answer(True)
             self.correct_answer()
             self.sentence_complete()
 
@@ -382,7 +407,7 @@ class MainWindow(QMainWindow):
 
         self.show_answer_btn.hide()
         if self.controller.sentence_active:
-            self.controller.current_list.num_completed += 1
+            self.engine.mark_answer(False)
             self.correct_or_not_label.setText("Incorrect!")
             self.sentence_complete()
 
@@ -418,27 +443,24 @@ class MainWindow(QMainWindow):
         """Hide the answer label (correct or incorrect)"""
         if auto_start is None:
             auto_start = self.user.auto_start
-        if user.no_typing:
+        if self.user.no_typing:
             self.show_answer_btn.hide()
         self.correct_or_not_label.setText("")
         self.sentence_label.setText("Generate a new sentence.")
         self.answer_timer.stop()
+        self.engine.flush_if_full()
         if bool(auto_start) is True:
             self.get_random_sentence()
 
     def correct_answer(self):
-        """Update variables and text when an answer is correct"""
-        self.user.num_correct += 1
-        self.controller.current_list.num_correct += 1
-        self.num_list_correct_label.setText(
-            f"List Correct: {self.controller.current_list.num_correct}"
-        )
+        """Update the text when an answer is correct"""
         self.correct_or_not_label.setText("Correct!")
 
     def sentence_complete(self):
         """For after the user has given an answer"""
+        self.num_list_correct_label.setText(self.list_score_text())
         if self.user.show_correct_sentence:
-            self.correct_answer_label.setText(self.controller.current_sentence.rstrip())
+            self.correct_answer_label.setText(self.controller.current_sentence)
 
         if (
             not self.user.no_typing
@@ -447,21 +469,20 @@ class MainWindow(QMainWindow):
             self.resp_timer.stop()
 
         self.answer_timer.start(2000)
-        self.controller.sentence_active = False
         self.input_box.setText("")
 
     def check_answer(self):
         """Check user input against correct answer"""
         if self.controller.sentence_active:
 
-            self.controller.current_list.num_completed += 1
-            if (
-                self.input_box.text().rstrip()
-                == self.controller.current_sentence.rstrip()
-            ):
+            score = self.engine.check_answer(self.input_box.text())
+            if score.is_correct:
                 self.correct_answer()
             else:
-                self.correct_or_not_label.setText("Incorrect!")
+                self.correct_or_not_label.setText(
+                    f"Incorrect! ({score.char_accuracy:.0%} of characters, "
+                    f"{score.word_accuracy:.0%} of words)"
+                )
 
             if self.sentence_label.text() != "Type the sentence and hit Enter.":
                 self.resp_timer.stop()
@@ -473,6 +494,7 @@ class MainWindow(QMainWindow):
 
     def set_dark_mode(self, dark_mode_bool):
         """Set the application palette"""
+        app = QApplication.instance()
         if dark_mode_bool:
             app.setStyle("Fusion")
             palette = QPalette()
@@ -491,129 +513,90 @@ class MainWindow(QMainWindow):
             palette.setColor(QPalette.HighlightedText, Qt.black)
             app.setPalette(palette)
         else:
-            app.setPalette(default_palette)
+            app.setPalette(self.default_palette)
             pass
 
 
-class User:
-    """For user-specific statistics and settings"""
-
-    def __init__(
-        self,
-        num_correct=0,
-        default_path="",
-        timer_duration=1,
-        char_timer_value=60,
-        char_based_timer=True,
-        no_typing=False,
-        auto_start=False,
-        show_correct_sentence=False,
-        dark_mode=False,
-    ):
-        self.num_correct = num_correct
-        self.default_path = default_path
-        self.timer_duration = timer_duration
-        self.char_timer_value = char_timer_value
-        self.char_based_timer = char_based_timer
-        self.no_typing = no_typing
-        self.auto_start = auto_start
-        self.show_correct_sentence = show_correct_sentence
-        self.dark_mode = dark_mode
-
-    def __repr__(self):
-        print(f"Number correct: {self.num_correct}")
-        print(f"Default path: {self.default_path}")
-        print(f"Timer duration: {self.timer_duration}")
-        print(f"Character timer value: {self.char_timer_value}")
-        print(f"Character-based timer: {self.char_based_timer}")
-        print(f"No typing: {self.no_typing}")
-        print(f"Auto start: {self.auto_start}")
-        print(f"Show correct sentence: {self.show_correct_sentence}")
-        print(f"Dark mode: {self.dark_mode}")
-
-
-def get_user_from_db(db):
-    """Get main user settings and statistics from database"""
-    users = db.get_all_users(connection)
-    current_user = None
-
-    if not users:
-        current_user = User()
-        db.add_user(
-            connection,
-            [
-                current_user.num_correct,
-                current_user.default_path,
-                current_user.timer_duration,
-                current_user.char_timer_value,
-                current_user.char_based_timer,
-                current_user.no_typing,
-                current_user.auto_start,
-                current_user.show_correct_sentence,
-                current_user.dark_mode,
-            ],
-        )
-    else:
-        # Get the first user (only one user is supported right now)
-        current_user = User(
-            users[0][0],
-            users[0][1],
-            users[0][2],
-            users[0][3],
-            users[0][4],
-            users[0][5],
-            users[0][6],
-            bool(users[0][7]),
-            bool(users[0][8]),
-        )
+class ImportThread(QThread):
+    """Worker thread streaming a text file into the database"""
 
-    return current_user
-
-
-def get_lists_from_db(db):
-    """Get sentence lists from database"""
-    all_sentence_lists = db.get_all_sentence_lists(connection)
-
-    deserialized_lists = []
-    if not all_sentence_lists:
-        if os.path.exists("../default_sentences.txt"):
-            with open("../default_sentences.txt", "r") as file:
-                new_list = SentenceList(file.readlines())
-                deserialized_lists.append(new_list)
-                db.add_sentence_list(
-                    connection,
-                    json.dumps(new_list.sentences),
-                    new_list.title,
-                    new_list.num_completed,
-                    new_list.num_correct,
-                )
-    else:
-        for sentence_list in all_sentence_lists:
-            new_list = SentenceList(
-                json.loads("".join(sentence_list[0])),
-                sentence_list[1],
-                sentence_list[2],
-                sentence_list[3],
+    progress = pyqtSignal(int)  # Percentage of the file read
+    imported = pyqtSignal(int)  # List id, or -1 if the file had no sentences
+    failed = pyqtSignal(str)
+    cancelled = pyqtSignal()
+
+    def __init__(self, database, path, title):
+        super().__init__()
+
+        self.database = database
+        self.path = path
+        self.title = title
+        self.is_cancelled = False
+        self.last_percent = -1
+
+    def cancel(self):
+        """Ask the import to stop before its next batch"""
+        self.is_cancelled = True
+
+    def report_progress(self, bytes_read, total):
+        """Emit progress only when the whole percentage changes"""
+        percent = bytes_read * 100 // total if total else 100
+        if percent != self.last_percent:
+            self.last_percent = percent
+            self.progress.emit(percent)
+
+    def run(self):
+        """Import the file using a connection owned by this thread"""
+        import importer
+
+        conn = self.database.open()
+        try:
+            list_id = importer.import_text_file(
+                conn,
+                self.path,
+                self.title,
+                progress=self.report_progress,
+                is_cancelled=lambda: self.is_cancelled,
             )
-            deserialized_lists.append(new_list)
+        except importer.ImportCancelled:
+            self.cancelled.emit()
+        except (OSError, sqlite3.Error) as err:
+            self.failed.emit(str(err))
+        else:
+            self.imported.emit(-1 if list_id is None else list_id)
+        finally:
+            conn.close()
+
 
-    return deserialized_lists
+def instrument(profiler):
+    """Time database calls, list hydration and the drill's hot paths"""
+    profiler.instrument(db)
+    profiler.instrument(engine_module, ("get_lists_from_db", "sentence_list_from_row"))
+    profiler.instrument(Engine, ("next_sentence", "check_answer", "use_sentence_list"))
+    profiler.instrument(
+        MainWindow, ("get_random_sentence", "check_answer", "use_sentence_list")
+    )
 
 
 if __name__ == "__main__":
+    startup_profile = StartupProfile.from_argv(sys.argv)
+    startup_profile.mark("imports")
+    profiler = Profiler.from_argv(sys.argv)
+    instrument(profiler)
     app = QApplication([])
     app.setStyleSheet("QLabel{font-size: 8pt;}")
-    default_palette = QGuiApplication.palette()
-
-    connection = db.create_connection("data.db")
-    user = get_user_from_db(db)
-    sentence_lists = get_lists_from_db(db)
+    startup_profile.mark("application")
 
-    controller = Controller(sentence_lists)
+    # Sentence lists are read after the first paint, see finish_startup
+    engine = Engine(db.ConnectionManager(DB_FILE), load_lists=False)
+    startup_profile.mark("database opened")
 
-    main = MainWindow(user, controller)
+    main = MainWindow(engine, startup_profile, profiler)
     main.setWindowTitle("Memory Builder")
     main.resize(480, 320)
     main.setMaximumSize(640, 480)
+    startup_profile.mark("window built")
     main.show()
-    sys.exit(app.exec_())
+    status = app.exec_()
+    profiler.report()
+    sys.exit(status)
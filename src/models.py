@@ -0,0 +1,290 @@
+"""Qt-free sentence list and user objects kept in sync with the database"""
+import db
+from packed import PackedSentences
+from sampler import SentenceSampler, RANDOM
+from length_index import LengthIndex, CHARS
+from tracking import DirtyTracked
+
+
+class SentenceList(DirtyTracked):
+    """For lists of sentences imported from a text file and stored in the database"""
+
+    __slots__ = (
+        "_sentences",
+        "title",
+        "num_completed",
+        "num_correct",
+        "list_id",
+        "_digest",
+        "_size",
+        "loader",
+        "deck_seed",
+        "deck_position",
+        "_sampler",
+        "length_loader",
+        "_length_indexes",
+        "_range_sampler",
+        "sources",
+        "pack_path",
+        "duplicate_loader",
+        "_duplicates",
+        "error",
+    )
+
+    tracked_fields = tuple(db.LIST_COLUMNS)
+
+    def __init__(
+        self,
+        sentences=None,
+        title="Default",
+        num_completed=0,
+        num_correct=0,
+        list_id=None,
+        digest=None,
+        size=None,
+        loader=None,
+        deck_seed=None,
+        deck_position=0,
+        length_loader=None,
+        sources=None,
+        pack_path=None,
+        duplicate_loader=None,
+    ):
+        self._sentences = (
+            None if sentences is None else PackedSentences.from_lines(sentences)
+        )
+        self.title = title
+        self.num_completed = num_completed
+        self.num_correct = num_correct
+        self.list_id = list_id  # Row id in the lists table, None until saved
+        self._digest = digest
+        self._size = size
+        self.loader = loader  # Callable yielding the sentences of a saved list
+        self.deck_seed = deck_seed  # Saved state of the sampler's shuffled deck
+        self.deck_position = deck_position
+        self._sampler = None
+        # Callable returning get_length_entries rows of a saved list for a unit
+        self.length_loader = length_loader
+        self._length_indexes = {}
+        self._range_sampler = None  # (key, sampler) drawing within a length range
+        # (list_id, position) each sentence was copied from, for transient lists
+        # such as search results that are never saved themselves
+        self.sources = sources
+        self.pack_path = pack_path  # Sentence pack read instead of the database
+        # Callable returning positions that repeat an earlier sentence of the list
+        self.duplicate_loader = duplicate_loader
+        self._duplicates = None
+        self.error = None  # Why the sentences cannot be read, e.g. a missing pack
+        self.mark_clean()
+
+    @property
+    def sentences(self):
+        """Sentences of the list, fetched through the loader on first access
+
+        They are held as PackedSentences, without trailing whitespace.
+        """
+        if self._sentences is None and self.loader is not None:
+            self._sentences = PackedSentences.from_lines(self.loader())
+        return self._sentences
+
+    @sentences.setter
+    def sentences(self, sentences):
+        self._sentences = (
+            None if sentences is None else PackedSentences.from_lines(sentences)
+        )
+        self._digest = None
+        self._size = None
+        self._sampler = None
+        self._length_indexes = {}
+        self._range_sampler = None
+        self._duplicates = None
+        self.error = None
+
+    @property
+    def is_loaded(self):
+        """Whether the sentences are currently held in memory"""
+        return self._sentences is not None
+
+    @property
+    def size(self):
+        """Number of sentences, known without loading them for saved lists"""
+        if self._sentences is not None:
+            return len(self._sentences)
+        return self._size or 0
+
+    @property
+    def sampler(self):
+        """Sampler over the list's positions, resuming the saved deck"""
+        if self._sampler is None or self._sampler.size != self.size:
+            self._sampler = SentenceSampler(
+                self.size, self.deck_seed, self.deck_position
+            )
+        return self._sampler
+
+    def length_index(self, unit):
+        """Index of the sentences sorted by length in characters or words"""
+        index = self._length_indexes.get(unit)
+        if index is None:
+            if self.length_loader is not None:
+                index = LengthIndex(self.length_loader(unit))
+            else:
+                index = LengthIndex.from_sentences(self.sentences or [], unit)
+            self._length_indexes[unit] = index
+        return index
+
+    @property
+    def duplicates(self):
+        """Positions of near-duplicates of earlier sentences in the list"""
+        if self._duplicates is None:
+            loader = self.duplicate_loader
+            self._duplicates = frozenset(loader() if loader is not None else ())
+        return self._duplicates
+
+    def skip_duplicates(self, draw, count):
+        """Call draw until it gives a position that is not a near-duplicate
+
+        At most count extra draws are made, so a deck of count positions
+        finds the list's other sentences if there are any.
+        """
+        duplicates = self.duplicates
+        position = draw()
+        for _ in range(count):
+            if position not in duplicates:
+                break
+            position = draw()
+        return position
+
+    def draw(self, mode=RANDOM, length_range=None):
+        """Pick the position of the next sentence to show
+
+        length_range is an optional (unit, min_length, max_length) filter;
+        None is returned when no sentence falls within it. Near-duplicates of
+        other sentences in the list are skipped while others remain.
+        """
+        if length_range is not None:
+            return self.draw_in_range(mode, *length_range)
+        sampler = self.sampler
+        position = self.skip_duplicates(lambda: sampler.draw(mode), self.size)
+        self.deck_seed = sampler.seed
+        self.deck_position = sampler.position
+        return position
+
+    def draw_in_range(self, mode, unit, min_length, max_length):
+        """Pick a sentence whose length falls within the range"""
+        index = self.length_index(unit)
+        start, stop = index.span(min_length, max_length)
+        if start == stop:
+            return None
+        key = (unit, start, stop)
+        if self._range_sampler is None or self._range_sampler[0] != key:
+            self._range_sampler = (key, SentenceSampler(stop - start))
+        sampler = self._range_sampler[1]
+        return self.skip_duplicates(
+            lambda: index.positions[start + sampler.draw(mode)], stop - start
+        )
+
+    @property
+    def is_transient(self):
+        """Whether the list only gathers sentences stored in other lists"""
+        return self.sources is not None
+
+    def source(self, position):
+        """(list_id, position) of the stored sentence shown at a position"""
+        if self.sources is None:
+            return self.list_id, position
+        return self.sources[position]
+
+    def save(self, conn):
+        """Write changed title and counters of a saved list to the database"""
+        if self.list_id is None or not self.is_dirty:
+            return
+        db.update_sentence_list_fields(conn, self.list_id, self.dirty_values())
+        self.mark_clean()
+
+    def unload(self):
+        """Release the sentences of a saved list so they are re-fetched when needed"""
+        if self.loader is not None and self._sentences is not None:
+            self._size = len(self._sentences)
+            self._sentences = None
+            self._length_indexes = {}
+            self._range_sampler = None
+
+    @property
+    def digest(self):
+        """Content digest of the sentences, computed once when not stored"""
+        if self._digest is None:
+            self._digest = db.sentences_digest(self.sentences or [])
+        return self._digest
+
+    def __eq__(self, other):
+        if not isinstance(other, SentenceList):
+            return NotImplemented
+        return self.digest == other.digest
+
+    def __repr__(self):
+        print(f"Sentences: {self.sentences}")
+        print(f"Title: {self.title}")
+        print(f"Number completed: {self.num_completed}")
+        print(f"Number corrected: {self.num_correct}")
+
+
+class User(DirtyTracked):
+    """For user-specific statistics and settings"""
+
+    tracked_fields = tuple(db.USER_COLUMNS)
+
+    def __init__(
+        self,
+        num_correct=0,
+        default_path="",
+        timer_duration=1,
+        char_timer_value=60,
+        char_based_timer=True,
+        no_typing=False,
+        auto_start=False,
+        show_correct_sentence=False,
+        dark_mode=False,
+        selection_mode=RANDOM,
+        min_length=0,
+        max_length=0,
+        length_unit=CHARS,
+    ):
+        self.num_correct = num_correct
+        self.default_path = default_path
+        self.timer_duration = timer_duration
+        self.char_timer_value = char_timer_value
+        self.char_based_timer = char_based_timer
+        self.no_typing = no_typing
+        self.auto_start = auto_start
+        self.show_correct_sentence = show_correct_sentence
+        self.dark_mode = dark_mode
+        self.selection_mode = selection_mode  # How the next sentence is picked
+        self.min_length = min_length  # Sentence length filter, 0 for no limit
+        self.max_length = max_length
+        self.length_unit = length_unit  # Whether lengths count chars or words
+        self.mark_clean()
+
+    def save(self, conn):
+        """Write changed settings and statistics to the database"""
+        if self.is_dirty:
+            db.update_user_fields(conn, self.dirty_values())
+            self.mark_clean()
+
+    def __repr__(self):
+        print(f"Number correct: {self.num_correct}")
+        print(f"Default path: {self.default_path}")
+        print(f"Timer duration: {self.timer_duration}")
+        print(f"Character timer value: {self.char_timer_value}")
+        print(f"Character-based timer: {self.char_based_timer}")
+        print(f"No typing: {self.no_typing}")
+        print(f"Auto start: {self.auto_start}")
+        print(f"Show correct sentence: {self.show_correct_sentence}")
+        print(f"Dark mode: {self.dark_mode}")
+        print(f"Selection mode: {self.selection_mode}")
+        print(f"Length filter: {self.min_length}-{self.max_length} {self.length_unit}")
+
+    def length_range(self):
+        """(unit, min_length, max_length) filter for sentences, None if unset"""
+        if not self.min_length and not self.max_length:
+            return None
+        return self.length_unit, self.min_length, self.max_length or None
@@ -0,0 +1,148 @@
+"""Read-only sentence packs: large corpora read through mmap instead of the database
+
+A pack file holds a header, an offsets table and the UTF-8 text:
+
+    magic     8 bytes  b"MBPACK\\0\\0"
+    version   uint32   PACK_VERSION
+    count     uint32   number of sentences
+    digest    32 bytes SHA-256 of the sentences, as db.sentences_digest
+    offsets   (count + 1) uint32, where sentence i is text[offsets[i]:offsets[i + 1]]
+    text      UTF-8 sentences without separators
+
+All integers are little-endian. Opened packs are mapped read-only, so
+sentences are decoded straight from the page cache, which every process
+reading the same pack shares.
+
+Run `python pack.py sentences.txt sentences.mbpack` to build a pack from a
+text file.
+"""
+import hashlib
+import mmap
+import os
+import shutil
+import struct
+import sys
+import tempfile
+from array import array
+import db
+from dedupe import unique_lines
+from packed import PackedSentences
+
+PACK_SUFFIX = ".mbpack"
+MAGIC = b"MBPACK\0\0"
+PACK_VERSION = 1
+HEADER = struct.Struct("<8sII32s")
+
+
+class PackError(ValueError):
+    """Raised for files that are not valid sentence packs"""
+
+
+def write_pack(path, lines):
+    """Write lines as a pack, replacing path atomically; returns (digest, count)
+
+    Lines are stripped and empty or repeated ones dropped, as when importing
+    a text file. Text is spooled to a temporary file so memory use is a
+    4-byte offset and 16 to 32 bytes of line keys per sentence.
+    """
+    import importer  # Only writing packs needs it, not reading them
+
+    hasher = hashlib.sha256()
+    offsets = array("I", [0])
+    directory = os.path.dirname(os.path.abspath(path))
+    with tempfile.TemporaryFile() as text:
+        length = 0
+        for line in unique_lines(importer.clean_lines(lines)):
+            db.digest_sentence(hasher, line)
+            encoded = line.encode("utf-8")
+            text.write(encoded)
+            length += len(encoded)
+            offsets.append(length)
+        count = len(offsets) - 1
+        digest = hasher.digest()
+
+        if sys.byteorder != "little":
+            offsets.byteswap()
+        handle, temp_path = tempfile.mkstemp(suffix=PACK_SUFFIX, dir=directory)
+        try:
+            with os.fdopen(handle, "wb") as out:
+                out.write(HEADER.pack(MAGIC, PACK_VERSION, count, digest))
+                out.write(offsets.tobytes())
+                text.seek(0)
+                shutil.copyfileobj(text, out)
+            os.replace(temp_path, path)
+        except BaseException:
+            os.remove(temp_path)
+            raise
+    return digest.hex(), count
+
+
+def read_header(path):
+    """Get (digest, count) of a pack without mapping it"""
+    with open(path, "rb") as file:
+        return parse_header(file.read(HEADER.size))
+
+
+def parse_header(data):
+    """Get (digest, count) from the first bytes of a pack"""
+    if len(data) < HEADER.size:
+        raise PackError("file too short for a sentence pack")
+    magic, version, count, digest = HEADER.unpack_from(data)
+    if magic != MAGIC:
+        raise PackError("not a sentence pack")
+    if version != PACK_VERSION:
+        raise PackError(f"unsupported sentence pack version {version}")
+    return digest.hex(), count
+
+
+def open_pack(path):
+    """Map a pack read-only and return its sentences without copying them"""
+    with open(path, "rb") as file:
+        mapped = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+    view = memoryview(mapped)
+    _, count = parse_header(view)
+    start = HEADER.size
+    text_start = start + 4 * (count + 1)
+    if len(view) < text_start:
+        raise PackError("truncated sentence pack")
+
+    if sys.byteorder == "little" and array("I").itemsize == 4:
+        offsets = view[start:text_start].cast("I")
+    else:
+        offsets = array("I")
+        offsets.frombytes(view[start:text_start])
+        if sys.byteorder != "little":
+            offsets.byteswap()
+    if offsets[count] > len(view) - text_start:
+        raise PackError("truncated sentence pack")
+    return PackedSentences(view[text_start:], offsets)
+
+
+def load_pack(path, digest, count):
+    """Sentences of a pack, checked to be those a list was saved with
+
+    Raises PackError if the file is missing, unreadable or has changed.
+    """
+    try:
+        if read_header(path) != (digest, count):
+            raise PackError(f"{path} no longer holds the sentences of this list")
+        return open_pack(path)
+    except OSError as err:
+        raise PackError(f"cannot read sentence pack: {err}") from err
+
+
+def main(argv=None):
+    args = sys.argv[1:] if argv is None else argv
+    if len(args) != 2:
+        print("usage: python pack.py SENTENCES.txt OUTPUT.mbpack")
+        return 2
+    import importer
+
+    with open(args[0], "rb") as file:
+        digest, count = write_pack(args[1], importer.iter_lines(file))
+    print(f"Packed {count} sentences into {args[1]} ({digest[:12]})")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
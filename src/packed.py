@@ -0,0 +1,66 @@
+"""Sentences packed into one UTF-8 buffer with an offsets table"""
+from array import array
+from collections.abc import Sequence
+
+
+class PackedSentences(Sequence):
+    """Read-only sequence of sentences stored as one contiguous UTF-8 buffer
+
+    Sentence i is data[offsets[i]:offsets[i + 1]], so each sentence costs
+    its encoded bytes plus a 4-byte offset instead of a str object. Lines are
+    stored without trailing whitespace, and are decoded on access.
+    """
+
+    __slots__ = ("data", "offsets")
+
+    def __init__(self, data=b"", offsets=None):
+        self.data = data  # Any bytes-like object, e.g. bytes or a memoryview
+        self.offsets = offsets if offsets is not None else array("I", [0])
+
+    @classmethod
+    def from_lines(cls, lines):
+        """Pack lines, stripping trailing whitespace such as newlines"""
+        if isinstance(lines, cls):
+            return lines
+        buffer = bytearray()
+        offsets = array("I", [0])
+        for line in lines:
+            buffer += line.rstrip().encode("utf-8")
+            offsets.append(len(buffer))
+        return cls(bytes(buffer), offsets)
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("sentence index out of range")
+        start, stop = self.offsets[index], self.offsets[index + 1]
+        return str(self.data[start:stop], "utf-8")
+
+    def __iter__(self):
+        data = self.data
+        offsets = self.offsets
+        for index in range(len(offsets) - 1):
+            yield str(data[offsets[index] : offsets[index + 1]], "utf-8")
+
+    def __eq__(self, other):
+        if isinstance(other, PackedSentences):
+            return bytes(self.data) == bytes(other.data) and (
+                self.offsets == other.offsets
+            )
+        if isinstance(other, (list, tuple)):
+            return list(self) == list(other)
+        return NotImplemented
+
+    def __repr__(self):
+        return f"PackedSentences({list(self)!r})"
+
+    @property
+    def nbytes(self):
+        """Memory held by the text and offsets"""
+        return len(self.data) + self.offsets.itemsize * len(self.offsets)
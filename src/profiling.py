@@ -0,0 +1,161 @@
+"""Opt-in latency histograms of database calls and the drill's hot paths"""
+import functools
+import inspect
+import sys
+import time
+from array import array
+from timing import NS_PER_MS
+
+FLAG = "--profile"
+SUB_BITS = 2  # Each power of two is split into 2 ** SUB_BITS buckets
+SUB_BUCKETS = 1 << SUB_BITS
+MAX_BITS = 40  # Durations up to about 18 minutes; longer ones share the last bucket
+NUM_BUCKETS = (MAX_BITS - SUB_BITS + 1) * SUB_BUCKETS
+
+
+def bucket_index(duration_ns):
+    """Histogram bucket of a duration, within 25% of its value"""
+    if duration_ns < SUB_BUCKETS:
+        return max(duration_ns, 0)
+    shift = duration_ns.bit_length() - 1 - SUB_BITS
+    index = (shift + 1) * SUB_BUCKETS + (duration_ns >> shift) - SUB_BUCKETS
+    return min(index, NUM_BUCKETS - 1)
+
+
+def bucket_limit(index):
+    """Smallest duration above the bucket, in nanoseconds"""
+    if index < SUB_BUCKETS:
+        return index + 1
+    shift = index // SUB_BUCKETS - 1
+    return (SUB_BUCKETS + index % SUB_BUCKETS + 1) << shift
+
+
+class LatencyHistogram:
+    """Counts of durations in fixed log-linear buckets
+
+    Recording is a bucket computation and an array increment, and the memory
+    used is the same however many durations are recorded.
+    """
+
+    __slots__ = ("counts", "count", "total_ns", "max_ns")
+
+    def __init__(self):
+        self.counts = array("Q", bytes(8 * NUM_BUCKETS))
+        self.count = 0
+        self.total_ns = 0
+        self.max_ns = 0
+
+    def record(self, duration_ns):
+        """Count one duration"""
+        self.counts[bucket_index(duration_ns)] += 1
+        self.count += 1
+        self.total_ns += duration_ns
+        if duration_ns > self.max_ns:
+            self.max_ns = duration_ns
+
+    def percentile(self, fraction):
+        """Upper bound in ns of the bucket holding the given share of durations"""
+        if not self.count:
+            return 0
+        rank = fraction * self.count
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if count and seen >= rank:
+                return min(bucket_limit(index), self.max_ns)
+        return self.max_ns
+
+
+class Profiler:
+    """Latency histograms by operation name, filled by wrapped callables
+
+    A disabled profiler wraps nothing and records nothing, so the only cost
+    left in the application is the clock reads around painting.
+    """
+
+    def __init__(self, enabled=False, clock=time.perf_counter_ns):
+        self.enabled = enabled
+        self.clock = clock
+        self.histograms = {}
+
+    @classmethod
+    def from_argv(cls, argv):
+        """Profiler enabled by the --profile command line flag"""
+        return cls(FLAG in argv)
+
+    def histogram(self, name):
+        """Histogram of an operation, created on first use"""
+        histogram = self.histograms.get(name)
+        if histogram is None:
+            histogram = self.histograms[name] = LatencyHistogram()
+        return histogram
+
+    def record(self, name, started_ns):
+        """Record an operation that started at clock() value started_ns"""
+        if self.enabled:
+            self.histogram(name).record(self.clock() - started_ns)
+
+    def wrap(self, name, func):
+        """Callable timing each call of func under name"""
+        histogram = self.histogram(name)
+        clock = self.clock
+
+        @functools.wraps(func)
+        def timed(*args, **kwargs):
+            started = clock()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                histogram.record(clock() - started)
+
+        return timed
+
+    def instrument(self, owner, names=None):
+        """Replace functions of a module, or methods of a class, with timed ones
+
+        By default every public function defined in a module is timed.
+        Generator functions are left alone, as only creating them would be
+        timed. Calls made through references taken earlier are not timed.
+        """
+        if not self.enabled:
+            return
+        if names is None:
+            names = [
+                name
+                for name, value in vars(owner).items()
+                if inspect.isfunction(value)
+                and value.__module__ == owner.__name__
+                and not name.startswith("_")
+                and not inspect.isgeneratorfunction(value)
+            ]
+        prefix = owner.__name__
+        for name in names:
+            setattr(owner, name, self.wrap(f"{prefix}.{name}", getattr(owner, name)))
+
+    def report(self, file=sys.stderr):
+        """Print calls and p50/p95/p99/max latency in ms of each operation"""
+        if not self.enabled:
+            return
+        rows = sorted(
+            (name, histogram)
+            for name, histogram in self.histograms.items()
+            if histogram.count
+        )
+        if not rows:
+            return
+        width = max(len(name) for name, _ in rows)
+        print(
+            f"{'operation':<{width}}  {'calls':>7}  {'p50':>8}  {'p95':>8}  "
+            f"{'p99':>8}  {'max':>8}",
+            file=file,
+        )
+        for name, histogram in rows:
+            p50, p95, p99 = (
+                histogram.percentile(fraction) / NS_PER_MS
+                for fraction in (0.5, 0.95, 0.99)
+            )
+            print(
+                f"{name:<{width}}  {histogram.count:>7}  {p50:8.3f}  {p95:8.3f}  "
+                f"{p99:8.3f}  {histogram.max_ns / NS_PER_MS:8.3f}",
+                file=file,
+            )
@@ -0,0 +1,120 @@
+"""Constant-time sentence selection without immediate repeats"""
+import random
+
+RANDOM = "random"
+DECK = "deck"
+MODES = (RANDOM, DECK)
+
+ROUNDS = 6
+SMALL_SIZE = 256  # Below this a shuffled table is cheaper than cycle-walking
+MASK64 = (1 << 64) - 1
+GOLDEN = 0x9E3779B97F4A7C15
+
+
+def _mix(value):
+    """splitmix64 finalizer, a cheap well-distributed 64-bit hash"""
+    value = ((value ^ (value >> 30)) * 0xBF58476D1CE4E5B9) & MASK64
+    value = ((value ^ (value >> 27)) * 0x94D049BB133111EB) & MASK64
+    return value ^ (value >> 31)
+
+
+class Permutation:
+    """Seeded shuffle of range(size) evaluated one index at a time
+
+    A small Feistel network permutes the enclosing power-of-four range and
+    cycle-walking folds it back onto range(size), so looking up an index
+    takes expected constant time and no memory proportional to size. Small
+    lists use a seeded shuffled table instead.
+    """
+
+    def __init__(self, size, seed):
+        self.size = size
+        self.seed = seed
+        self.table = None
+        if size < SMALL_SIZE:
+            self.table = list(range(size))
+            random.Random(seed).shuffle(self.table)
+        bits = max(2, (size - 1).bit_length())
+        bits += bits % 2
+        self.half_bits = bits // 2
+        self.half_mask = (1 << self.half_bits) - 1
+        self.keys = [_mix((seed + GOLDEN * (r + 1)) & MASK64) for r in range(ROUNDS)]
+
+    def __len__(self):
+        return self.size
+
+    def __getitem__(self, index):
+        if not 0 <= index < self.size:
+            raise IndexError(index)
+        if self.table is not None:
+            return self.table[index]
+        value = self._encrypt(index)
+        while value >= self.size:
+            value = self._encrypt(value)
+        return value
+
+    def _encrypt(self, value):
+        left = value >> self.half_bits
+        right = value & self.half_mask
+        for key in self.keys:
+            left, right = right, left ^ (_mix(right ^ key) & self.half_mask)
+        return (left << self.half_bits) | right
+
+
+class SentenceSampler:
+    """Picks sentence positions from a list of the given size
+
+    In RANDOM mode every draw is uniform over all positions except the
+    previous pick. In DECK mode positions come from a shuffled deck, so each
+    one is returned once before any repeats; seed and position fully
+    describe the deck and can be saved to resume it later.
+    """
+
+    def __init__(self, size, seed=None, position=0, rng=None):
+        self.size = size
+        self.rng = rng or random.Random()
+        self.last = None
+        if seed is None:
+            seed = self.rng.getrandbits(63)
+            position = 0
+        self.deck = Permutation(size, seed)
+        self.position = min(position, size)
+
+    @property
+    def seed(self):
+        """Seed of the current deck"""
+        return self.deck.seed
+
+    def draw(self, mode=RANDOM):
+        """Return the next sentence position, never repeating the last one"""
+        if not self.size:
+            raise IndexError("cannot draw from an empty list")
+        if mode == DECK:
+            pick = self.draw_from_deck()
+        else:
+            pick = self.draw_random()
+        self.last = pick
+        return pick
+
+    def draw_random(self):
+        """Uniform draw over every position except the previous pick"""
+        if self.last is None or self.size == 1:
+            return self.rng.randrange(self.size)
+        pick = self.rng.randrange(self.size - 1)
+        return pick + 1 if pick >= self.last else pick
+
+    def draw_from_deck(self):
+        """Next position of the deck, reshuffling once it is exhausted"""
+        if self.position >= self.size:
+            self.reshuffle()
+        pick = self.deck[self.position]
+        self.position += 1
+        return pick
+
+    def reshuffle(self):
+        """Start a new deck that does not open with the previous pick"""
+        while True:
+            self.deck = Permutation(self.size, self.rng.getrandbits(63))
+            if self.size == 1 or self.deck[0] != self.last:
+                break
+        self.position = 0
@@ -0,0 +1,141 @@
+"""Spaced-repetition scheduling of the sentences in a list"""
+import heapq
+import time
+from sampler import DECK
+
+REVIEW = "review"
+
+DAY = 24 * 60 * 60
+RELEARN_DELAY = 60  # Seconds before a failed sentence is due again
+DEFAULT_EASE = 2.5
+MIN_EASE = 1.3
+MAX_INTERVAL = 36500  # Days; keeps intervals of well-known sentences bounded
+CORRECT_QUALITY = 4  # SM-2 grades (0-5) given for a plain correct/incorrect answer
+INCORRECT_QUALITY = 1
+
+
+class ReviewState:
+    """SM-2 review state of one sentence"""
+
+    __slots__ = ("position", "ease", "interval", "repetitions", "due")
+
+    def __init__(
+        self, position, ease=DEFAULT_EASE, interval=0, repetitions=0, due=0.0
+    ):
+        self.position = position
+        self.ease = ease
+        self.interval = interval  # Days until the next review
+        self.repetitions = repetitions  # Successful reviews in a row
+        self.due = due  # Unix time the sentence is next due
+
+    def grade(self, quality, now):
+        """Update the state after an answer graded 0 (blackout) to 5 (perfect)"""
+        if quality < 3:
+            self.repetitions = 0
+            self.interval = 0
+            self.due = now + RELEARN_DELAY
+        else:
+            self.repetitions += 1
+            if self.repetitions == 1:
+                self.interval = 1
+            elif self.repetitions == 2:
+                self.interval = 6
+            else:
+                self.interval = min(MAX_INTERVAL, round(self.interval * self.ease))
+            self.due = now + self.interval * DAY
+        penalty = (5 - quality) * (0.08 + (5 - quality) * 0.02)
+        self.ease = max(MIN_EASE, self.ease + 0.1 - penalty)
+
+    def as_row(self, list_id):
+        """Row for db.save_reviews"""
+        return (
+            list_id,
+            self.position,
+            self.ease,
+            self.interval,
+            self.repetitions,
+            self.due,
+        )
+
+
+class ReviewScheduler:
+    """Picks the sentence of a list that is most overdue for review
+
+    Reviewed sentences sit in a heap ordered by due time, so each pick and
+    grade costs O(log n). Regrading leaves the old heap entry in place;
+    entries whose due time no longer matches the state are skipped. When
+    nothing is due, sentences never reviewed before are introduced from the
+    list's shuffled deck; once every sentence has been seen the earliest
+    due one is reviewed early.
+    """
+
+    def __init__(self, sentence_list, states=(), clock=time.time):
+        self.sentence_list = sentence_list
+        self.clock = clock
+        self.states = {state.position: state for state in states}
+        self.heap = [(state.due, state.position) for state in self.states.values()]
+        heapq.heapify(self.heap)
+        self.pending = None  # Picked position that has not been graded yet
+        self.dirty = set()  # Positions whose state changed since the last save
+
+    def next(self):
+        """Return the position of the next sentence to show"""
+        self.requeue_pending()
+        top = self.peek()
+        if top is not None and top[0] <= self.clock():
+            position = heapq.heappop(self.heap)[1]
+        elif len(self.states) < self.new_limit():
+            position = self.draw_new()
+        elif top is not None:
+            position = heapq.heappop(self.heap)[1]
+        else:
+            position = self.sentence_list.draw(DECK)
+        self.pending = position
+        return position
+
+    def peek(self):
+        """Get the (due, position) entry due first, dropping stale entries"""
+        while self.heap:
+            due, position = self.heap[0]
+            if self.states[position].due == due:
+                return self.heap[0]
+            heapq.heappop(self.heap)
+        return None
+
+    def new_limit(self):
+        """Number of sentences the deck can introduce, leaving out near-duplicates
+
+        The deck never draws near-duplicates while other sentences remain, so
+        counting them would keep waiting for sentences it cannot give.
+        """
+        return self.sentence_list.size - len(self.sentence_list.duplicates)
+
+    def draw_new(self):
+        """Draw a sentence without review state from the list's deck"""
+        while True:
+            position = self.sentence_list.draw(DECK)
+            if position not in self.states:
+                return position
+
+    def requeue_pending(self):
+        """Put a picked but ungraded sentence back where it was"""
+        if self.pending is not None and self.pending in self.states:
+            state = self.states[self.pending]
+            heapq.heappush(self.heap, (state.due, state.position))
+        self.pending = None
+
+    def grade(self, position, quality):
+        """Record an answer to a sentence and reschedule it"""
+        state = self.states.get(position)
+        if state is None:
+            state = self.states[position] = ReviewState(position)
+        if position == self.pending:
+            self.pending = None
+        state.grade(quality, self.clock())
+        heapq.heappush(self.heap, (state.due, position))
+        self.dirty.add(position)
+
+    def dirty_rows(self):
+        """Rows of review states changed since the last save"""
+        list_id = self.sentence_list.list_id
+        return [self.states[position].as_row(list_id) for position in self.dirty]
@@ -0,0 +1,231 @@
+"""Scoring typed answers against the correct sentence"""
+import unicodedata
+from functools import lru_cache
+from scheduler import CORRECT_QUALITY
+
+# Typographic characters typed as their plain keyboard equivalents
+TRANSLATION = str.maketrans(
+    {
+        "\u2018": "'",  # Curly single quotes and apostrophes
+        "\u2019": "'",
+        "\u201a": "'",
+        "\u201b": "'",
+        "\u2032": "'",
+        "\u201c": '"',  # Curly double quotes
+        "\u201d": '"',
+        "\u201e": '"',
+        "\u201f": '"',
+        "\u2033": '"',
+        "\u2013": "-",  # En and em dashes
+        "\u2014": "-",
+        "\u2026": "...",
+        "\u00a0": " ",  # No-break space
+    }
+)
+KEY_CACHE_SIZE = 4096
+
+
+def normalize(text):
+    """NFC-normalize, straighten quotes and collapse whitespace"""
+    text = unicodedata.normalize("NFC", text).translate(TRANSLATION)
+    return " ".join(text.split())
+
+
+@lru_cache(maxsize=KEY_CACHE_SIZE)
+def answer_key(sentence):
+    """Normalized text and words of a correct sentence, cached per sentence"""
+    text = normalize(sentence)
+    return text, tuple(text.split(" ")) if text else ()
+
+
+def common_affix_lengths(a, b):
+    """Lengths of the common prefix and of the common suffix after it
+
+    Found by binary search over slice comparisons, which run in C.
+    """
+    low, high = 0, min(len(a), len(b))
+    while low < high:
+        middle = (low + high + 1) // 2
+        if a[:middle] == b[:middle]:
+            low = middle
+        else:
+            high = middle - 1
+    prefix = low
+
+    low, high = 0, min(len(a), len(b)) - prefix
+    while low < high:
+        middle = (low + high + 1) // 2
+        if a[len(a) - middle :] == b[len(b) - middle :]:
+            low = middle
+        else:
+            high = middle - 1
+    return prefix, low
+
+
+def edit_distance(a, b):
+    """Levenshtein distance between two sequences
+
+    The common prefix and suffix are skipped, then the rest is compared with
+    the bit-parallel algorithm of Myers as adapted by Hyyro: each column of
+    the DP matrix is one integer, so the cost is O(len(b)) big-int
+    operations instead of O(len(a) * len(b)) cell updates.
+    """
+    if a == b:
+        return 0
+    prefix, suffix = common_affix_lengths(a, b)
+    a = a[prefix : len(a) - suffix]
+    b = b[prefix : len(b) - suffix]
+    if not a:
+        return len(b)
+    if not b:
+        return len(a)
+
+    peq = {}
+    for i, item in enumerate(a):
+        peq[item] = peq.get(item, 0) | (1 << i)
+    get = peq.get
+    mask = (1 << len(a)) - 1
+    high = 1 << (len(a) - 1)
+    pv = mask
+    mv = 0
+    score = len(a)
+    for item in b:
+        eq = get(item, 0)
+        xv = eq | mv
+        xh = (((eq & pv) + pv) ^ pv) | eq
+        ph = mv | ~(xh | pv)  # Negative values stand for bits set above mask
+        mh = pv & xh
+        if ph & high:
+            score += 1
+        elif mh & high:
+            score -= 1
+        ph = (ph << 1) | 1
+        mh <<= 1
+        pv = (mh | ~(xv | ph)) & mask
+        mv = ph & xv & mask
+    return score
+
+
+def edit_opcodes(a, b, distance=None):
+    """Edit operations turning a into b, in difflib get_opcodes() format
+
+    Only cells within distance of the diagonal can lie on an optimal path,
+    so the DP is restricted to that band: O(distance * len(a)) time.
+    """
+    if distance is None:
+        distance = edit_distance(a, b)
+    n, m = len(a), len(b)
+    band = max(distance, abs(n - m))
+    infinity = n + m + 1
+
+    # rows[i][j - i + band] holds D[i][j] for |i - j| <= band
+    width = 2 * band + 1
+    rows = []
+    for i in range(n + 1):
+        row = [infinity] * width
+        for offset in range(width):
+            j = i + offset - band
+            if j < 0 or j > m:
+                continue
+            if i == 0:
+                row[offset] = j
+                continue
+            previous = rows[i - 1]
+            best = previous[offset] + (a[i - 1] != b[j - 1]) if j else i
+            if offset + 1 < width:
+                best = min(best, previous[offset + 1] + 1)
+            if j and offset:
+                best = min(best, row[offset - 1] + 1)
+            row[offset] = best
+        rows.append(row)
+
+    # Walk back from the bottom-right corner, collecting single-step edits
+    steps = []
+    i, j = n, m
+    while i or j:
+        offset = j - i + band
+        current = rows[i][offset]
+        if i and j and rows[i - 1][offset] + (a[i - 1] != b[j - 1]) == current:
+            steps.append("equal" if a[i - 1] == b[j - 1] else "replace")
+            i -= 1
+            j -= 1
+        elif i and offset + 1 < width and rows[i - 1][offset + 1] + 1 == current:
+            steps.append("delete")
+            i -= 1
+        else:
+            steps.append("insert")
+            j -= 1
+    steps.reverse()
+
+    opcodes = []
+    i = j = 0
+    for tag in steps:
+        di = 0 if tag == "insert" else 1
+        dj = 0 if tag == "delete" else 1
+        if opcodes and opcodes[-1][0] == tag:
+            opcodes[-1][2] += di
+            opcodes[-1][4] += dj
+        else:
+            opcodes.append([tag, i, i + di, j, j + dj])
+        i += di
+        j += dj
+    return [tuple(opcode) for opcode in opcodes]
+
+
+class Score:
+    """Result of comparing a typed answer with the correct sentence"""
+
+    __slots__ = ("expected", "typed", "distance", "char_accuracy", "word_accuracy")
+
+    def __init__(self, expected, typed, distance, char_accuracy, word_accuracy):
+        self.expected = expected  # Normalized correct sentence
+        self.typed = typed  # Normalized answer
+        self.distance = distance  # Character edit distance
+        self.char_accuracy = char_accuracy
+        self.word_accuracy = word_accuracy
+
+    @property
+    def is_correct(self):
+        """Whether the answer matches the sentence after normalization"""
+        return self.distance == 0
+
+    @property
+    def opcodes(self):
+        """Character edits from the correct sentence to the answer"""
+        return edit_opcodes(self.expected, self.typed, self.distance)
+
+    def quality(self):
+        """SM-2 grade (0-5) for the answer, giving partial credit to near misses"""
+        if self.is_correct:
+            return CORRECT_QUALITY
+        if self.char_accuracy >= 0.9:
+            return 2
+        if self.char_accuracy >= 0.6:
+            return 1
+        return 0
+
+
+def accuracy(distance, expected_length, typed_length):
+    """Share of the longer sequence that did not need an edit"""
+    longest = max(expected_length, typed_length)
+    return 1.0 - distance / longest if longest else 1.0
+
+
+def score_answer(sentence, answer):
+    """Score a typed answer against a sentence"""
+    expected, expected_words = answer_key(sentence)
+    typed = normalize(answer)
+    typed_words = tuple(typed.split(" ")) if typed else ()
+
+    distance = edit_distance(expected, typed)
+    if distance:
+        word_distance = edit_distance(expected_words, typed_words)
+    else:
+        word_distance = 0
+    return Score(
+        expected,
+        typed,
+        distance,
+        accuracy(distance, len(expected), len(typed)),
+        accuracy(word_distance, len(expected_words), len(typed_words)),
+    )
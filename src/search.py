@@ -0,0 +1,86 @@
+"""Window for searching all stored sentences and drilling the hits"""
+from PyQt5.QtWidgets import (
+    QMainWindow,
+    QWidget,
+    QHBoxLayout,
+    QVBoxLayout,
+    QLineEdit,
+    QCheckBox,
+    QPushButton,
+    QListWidget,
+    QLabel,
+)
+
+MAX_SHOWN = 200  # Hits listed in the window; a drill uses every hit
+
+
+class SearchWindow(QMainWindow):
+    """Full-text search over the sentences of every list"""
+
+    def __init__(self, mw):
+        super().__init__()
+
+        self.mw = mw
+
+        self.resize(480, 320)
+        self.setWindowTitle("Search Sentences")
+
+        self.search_line = QLineEdit()
+        self.search_line.setPlaceholderText('Words, or "an exact phrase"')
+        self.search_line.returnPressed.connect(self.search)
+
+        self.missed_input = QCheckBox("Only sentences I missed")
+        self.missed_input.stateChanged.connect(self.search)
+
+        self.search_btn = QPushButton("Search")
+        self.search_btn.clicked.connect(self.search)
+
+        self.results = QListWidget()
+        self.results.setUniformItemSizes(True)
+
+        self.count_label = QLabel("")
+
+        self.drill_btn = QPushButton("Drill These")
+        self.drill_btn.clicked.connect(self.drill)
+        self.drill_btn.setEnabled(False)
+
+        self.search_layout = QHBoxLayout()
+        self.search_layout.addWidget(self.search_line)
+        self.search_layout.addWidget(self.search_btn)
+
+        self.drill_layout = QHBoxLayout()
+        self.drill_layout.addWidget(self.count_label)
+        self.drill_layout.addWidget(self.drill_btn)
+
+        self.layout = QVBoxLayout()
+        self.layout.addLayout(self.search_layout)
+        self.layout.addWidget(self.missed_input)
+        self.layout.addWidget(self.results)
+        self.layout.addLayout(self.drill_layout)
+
+        self.window = QWidget(self)
+        self.setCentralWidget(self.window)
+        self.window.setLayout(self.layout)
+
+    def search(self):
+        """List the sentences matching the search"""
+        rows = self.mw.engine.search_sentences(
+            self.search_line.text(), self.missed_input.isChecked(), MAX_SHOWN + 1
+        )
+        self.results.clear()
+        self.results.addItems(
+            [f"{sentence}  ({title})" for _, title, _, sentence in rows[:MAX_SHOWN]]
+        )
+        if len(rows) > MAX_SHOWN:
+            self.count_label.setText(f"More than {MAX_SHOWN} sentences")
+        else:
+            self.count_label.setText(f"{len(rows)} sentences")
+        self.drill_btn.setEnabled(bool(rows))
+
+    def drill(self):
+        """Practice the sentences matching the search"""
+        if self.mw.engine.drill_search(
+            self.search_line.text(), self.missed_input.isChecked()
+        ):
+            self.mw.show_current_list()
+            self.close()
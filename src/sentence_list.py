@@ -1,18 +1,76 @@
-"""Classes for sentence list widgets and list object"""
-import json
+"""Classes for sentence list widgets"""
+from PyQt5.QtCore import Qt, QAbstractListModel, QModelIndex
 from PyQt5.QtWidgets import (
     QMainWindow,
     QHBoxLayout,
     QWidget,
-    QListWidget,
-    QStackedWidget,
+    QListView,
     QFormLayout,
     QLabel,
     QLineEdit,
     QPushButton,
 )
 from PyQt5.QtGui import QFont
-import db
+from engine import LISTS_INSERTED, LISTS_REMOVED
+
+
+class SentenceListModel(QAbstractListModel):
+    """Titles of the engine's sentence lists, read on demand by the view
+
+    The model wraps the engine's own list instead of copying it, so creating
+    it costs the same however many lists there are. It watches the engine
+    for lists added, removed or reloaded, so views stay current.
+    """
+
+    def __init__(self, engine, parent=None):
+        super().__init__(parent)
+
+        self.engine = engine
+        engine.list_watchers.add(self)
+
+    def rowCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+        return len(self.engine.sentence_lists)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid() or role != Qt.DisplayRole:
+            return None
+        return self.engine.sentence_lists[index.row()].title
+
+    def lists_changing(self, change, row):
+        """Start notifying views of a change to the engine's lists"""
+        if change == LISTS_INSERTED:
+            self.beginInsertRows(QModelIndex(), row, row)
+        elif change == LISTS_REMOVED:
+            self.beginRemoveRows(QModelIndex(), row, row)
+        else:
+            self.beginResetModel()
+
+    def lists_changed(self, change, row):
+        """Finish notifying views of a change to the engine's lists"""
+        if change == LISTS_INSERTED:
+            self.endInsertRows()
+        elif change == LISTS_REMOVED:
+            self.endRemoveRows()
+        else:
+            self.endResetModel()
+
+    def sentence_list(self, row):
+        """Sentence list shown in a row, None for an invalid row"""
+        if 0 <= row < len(self.engine.sentence_lists):
+            return self.engine.sentence_lists[row]
+        return None
+
+    def rename_list(self, row, title):
+        """Rename the list in a row and save it"""
+        self.engine.rename_sentence_list(self.sentence_list(row), title)
+        index = self.index(row)
+        self.dataChanged.emit(index, index, [Qt.DisplayRole])
+
+    def delete_list(self, row):
+        """Delete the list in a row, returning the list that is now current"""
+        return self.engine.delete_sentence_list(self.sentence_list(row))
 
 
 class SentenceListWindow(QMainWindow):
@@ -23,72 +81,58 @@ class SentenceListWindow(QMainWindow):
 
         self.mw = mw
 
-        self.connection = db.create_connection("data.db")
-
         self.resize(400, 240)
         self.setWindowTitle("Sentence Lists")
 
         self.layout = QHBoxLayout()
         self.select_layout = QHBoxLayout()
 
-        self.list_stack_info = QListWidget()
-        self.list_stack = QStackedWidget(self)
-
-        self.stack_sentence_lists()
+        self.list_model = SentenceListModel(self.mw.engine, self)
+        self.list_view = QListView()
+        self.list_view.setUniformItemSizes(True)  # Skip measuring every row
+        self.list_view.setModel(self.list_model)
+        self.list_details = SentenceListDetails(self, self.mw)
 
-        self.select_layout.addWidget(self.list_stack_info)
-        self.select_layout.addWidget(self.list_stack)
+        self.select_layout.addWidget(self.list_view)
+        self.select_layout.addWidget(self.list_details)
 
         self.layout.addLayout(self.select_layout)
 
-        self.list_stack_info.currentRowChanged.connect(self.display_list_settings)
+        self.list_view.selectionModel().currentRowChanged.connect(
+            self.display_list_settings
+        )
 
         self.window = QWidget(self)
         self.setCentralWidget(self.window)
         self.window.setLayout(self.layout)
 
-    def closeEvent(self, event):
-        """Close database connection upon window closing"""
-        self.connection.close()
-
-    def stack_sentence_lists(self):
-        """Set up sentence list stack and associated settings"""
-        for index, sentence_list in enumerate(self.mw.controller.sentence_lists):
-            self.stack_item = SentenceListStackItem(self, self.mw, sentence_list, index)
-            self.list_stack_info.insertItem(index, f"{sentence_list.title}")
-            self.stack_item.setLayout(self.stack_item.info_layout)
-            self.list_stack.addWidget(self.stack_item)
+    def display_list_settings(self, current, previous=None):
+        """Display the selected list's settings"""
+        self.list_details.show_list(current.row())
 
-    def display_list_settings(self, index):
-        """Display the current stack item's settings"""
-        self.list_stack.setCurrentIndex(index)
 
+class SentenceListDetails(QWidget):
+    """Settings of the sentence list selected in the list window"""
 
-class SentenceListStackItem(QWidget):
-    """List widget item for each sentence list"""
-
-    def __init__(self, parent, mw, sentence_list, index):
+    def __init__(self, parent, mw):
         super().__init__()
 
         self.parent = parent
         self.mw = mw
         self.controller = self.mw.controller
-        self.connection = parent.connection
-        self.sentence_list = sentence_list
-        self.index = index
+        self.list_model = parent.list_model
+        self.row = -1  # Row of the list shown, -1 if none is selected
 
         self.info_layout = QFormLayout()
 
-        self.list_name_label = QLabel(f"{sentence_list.title}")
+        self.list_name_label = QLabel("")
         self.list_name_label.setFont(QFont("Times", weight=QFont.Bold))
         self.info_layout.addRow(self.list_name_label)
 
-        self.list_completed_label = QLabel(
-            f"Number completed: {sentence_list.num_completed}"
-        )
+        self.list_completed_label = QLabel("")
         self.info_layout.addRow(self.list_completed_label)
 
-        self.list_correct_label = QLabel(f"Number correct: {sentence_list.num_correct}")
+        self.list_correct_label = QLabel("")
         self.info_layout.addRow(self.list_correct_label)
 
         self.rename_line = QLineEdit()
@@ -107,79 +151,53 @@ class SentenceListStackItem(QWidget):
         self.button_layout.setContentsMargins(0, 50, 0, 0)
 
         self.info_layout.addRow(self.button_layout)
+        self.setLayout(self.info_layout)
+
+        self.show_list(-1)
+
+    @property
+    def sentence_list(self):
+        """List whose settings are shown"""
+        return self.list_model.sentence_list(self.row)
+
+    def show_list(self, row):
+        """Bind the pane to the list in a row of the model"""
+        self.row = row
+        sentence_list = self.sentence_list
+        self.setEnabled(sentence_list is not None)
+        self.rename_line.setText("")
+        if sentence_list is None:
+            self.list_name_label.setText("")
+            self.list_completed_label.setText("")
+            self.list_correct_label.setText("")
+            return
+        self.list_name_label.setText(f"{sentence_list.title}")
+        self.list_completed_label.setText(
+            f"Number completed: {sentence_list.num_completed}"
+        )
+        self.list_correct_label.setText(f"Number correct: {sentence_list.num_correct}")
 
     def save_changes(self):
         """Save changes made to sentence list settings"""
-        if self.rename_line:
-            old_title = self.sentence_list.title
-            self.sentence_list.title = self.rename_line.text()
-            action_idx = self.controller.sentence_lists.index(self.sentence_list)
-
-            try:
-                self.mw.menu_actions[action_idx].setText(self.sentence_list.title)
-            except ValueError:
-                print("Not found")
-
-            self.list_name_label.setText(self.rename_line.text())
-            self.parent.list_stack_info.item(action_idx).setText(
-                self.rename_line.text()
-            )
-            if old_title in self.mw.current_list_label.text():
-                self.mw.current_list_label.setText(
-                    f"Current List: {self.rename_line.text()}"
-                )
-            self.rename_line.setText("")
+        if self.sentence_list is not None and self.rename_line.text():
+            title = self.rename_line.text()
+            self.list_model.rename_list(self.row, title)
 
-            db.update_sentence_list(
-                self.connection,
-                json.dumps(self.sentence_list.sentences),
-                self.sentence_list.title,
-                self.sentence_list.num_completed,
-                self.sentence_list.num_correct,
-            )
+            self.list_name_label.setText(title)
+            if self.sentence_list is self.controller.current_list:
+                self.mw.current_list_label.setText(f"Current List: {title}")
+            self.rename_line.setText("")
 
     def delete_list(self):
         """Delete a sentence_list, which deletes it from the database"""
-        if not self.sentence_list:
+        if self.sentence_list is None:
             return
 
-        db.delete_sentence_list(
-            self.connection, json.dumps(self.sentence_list.sentences)
-        )
-        self.controller.deleted_lists.append(self.sentence_list)
-        action_idx = self.controller.sentence_lists.index(self.sentence_list)
-
-        try:
-            self.mw.sentence_menu.removeAction(self.mw.menu_actions[action_idx])
-            self.mw.menu_actions.pop(action_idx)
-        except ValueError:
-            print("Not found")
-
-        self.controller.sentence_lists.remove(self.sentence_list)
-        if self.controller.current_list == self.sentence_list:
-            if self.controller.sentence_lists:
-                self.mw.use_sentence_list(self.controller.sentence_lists[0])
-            else:
-                self.mw.no_lists_available()
-
-        # self.sentence_list = None
-        self.parent.list_stack_info.takeItem(self.index)
-
-
-class SentenceList:
-    """For lists of sentences imported from a text file and stored in the database"""
-
-    def __init__(self, sentences=None, title="Default", num_completed=0, num_correct=0):
-        self.sentences = sentences
-        self.title = title
-        self.num_completed = num_completed
-        self.num_correct = num_correct
-
-    def __eq__(self, other):
-        return self.sentences == other.sentences
-
-    def __repr__(self):
-        print(f"Sentences: {self.sentences}")
-        print(f"Title: {self.title}")
-        print(f"Number completed: {self.num_completed}")
-        print(f"Number corrected: {self.num_correct}")
+        was_current = self.controller.current_list == self.sentence_list
+
+        if self.list_model.delete_list(self.row) is None:
+            self.mw.no_lists_available()
+        elif was_current:
+            self.mw.show_current_list()
+
+        self.show_list(self.parent.list_view.currentIndex().row())
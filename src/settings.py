@@ -13,7 +13,19 @@ from PyQt5.QtWidgets import (
     QSpinBox,
     QTabWidget,
     QGridLayout,
+    QComboBox,
 )
+from sampler import RANDOM, DECK
+from scheduler import REVIEW
+from length_index import CHARS, WORDS
+
+SELECTION_MODES = [
+    (RANDOM, "Random"),
+    (DECK, "Shuffled Deck"),
+    (REVIEW, "Spaced Repetition"),
+]
+LENGTH_UNITS = [(CHARS, "Characters"), (WORDS, "Words")]
+MAX_LENGTH = 10000
 
 
 class SettingsWindow(QMainWindow):
@@ -36,12 +48,16 @@ class SettingsWindow(QMainWindow):
         self.tabs = QTabWidget()
         self.main_tab = QWidget()
         self.timer_tab = QWidget()
+        self.length_tab = QWidget()
         self.shortcut_tab = QWidget()
+        self.length_estimate_label = QLabel("")
         self.main_tab_content()
         self.timer_tab_content()
+        self.length_tab_content()
         self.shortcut_tab_content()
         self.tabs.addTab(self.main_tab, "Main")
         self.tabs.addTab(self.timer_tab, "Timer")
+        self.tabs.addTab(self.length_tab, "Length")
         self.tabs.addTab(self.shortcut_tab, "Shortcuts")
         self.layout.addWidget(self.tabs)
 
@@ -81,6 +97,17 @@ class SettingsWindow(QMainWindow):
             self.dark_mode_cb.setChecked(True)
         self.main_settings_box.addWidget(self.dark_mode_cb)
 
+        self.selection_mode_label = QLabel("Sentence Order")
+        self.selection_mode_input = QComboBox()
+        for mode, name in SELECTION_MODES:
+            self.selection_mode_input.addItem(name, mode)
+        self.selection_mode_input.setCurrentIndex(
+            max(self.selection_mode_input.findData(self.user.selection_mode), 0)
+        )
+        self.main_settings_box.addRow(
+            self.selection_mode_label, self.selection_mode_input
+        )
+
         self.main_tab.setLayout(self.main_settings_box)
 
     def timer_tab_content(self):
@@ -92,6 +119,7 @@ class SettingsWindow(QMainWindow):
         self.timer_input = QSpinBox()
         self.timer_input.setValue(self.user.timer_duration)
         self.timer_input.setMaximumWidth(50)
+        self.timer_input.valueChanged.connect(self.update_length_estimate)
         self.timer_settings_box.addRow(self.timer_label, self.timer_input)
 
         self.char_timer_label = QLabel(f"ms/character: {self.user.char_timer_value}")
@@ -104,6 +132,7 @@ class SettingsWindow(QMainWindow):
         self.char_based_timer_cb = QCheckBox("Characater length-based Timer")
         if bool(self.user.char_based_timer) is True:
             self.char_based_timer_cb.setChecked(True)
+        self.char_based_timer_cb.stateChanged.connect(self.update_length_estimate)
         self.timer_settings_box.addWidget(self.char_based_timer_cb)
 
         self.auto_start_cb = QCheckBox("Auto Start")
@@ -113,6 +142,61 @@ class SettingsWindow(QMainWindow):
 
         self.timer_tab.setLayout(self.timer_settings_box)
 
+    def length_tab_content(self):
+        """Widgets for the sentence length filter tab"""
+        self.length_settings_box = QFormLayout()
+        self.length_settings_box.setAlignment(Qt.AlignHCenter)
+
+        self.length_unit_label = QLabel("Unit")
+        self.length_unit_input = QComboBox()
+        for unit, name in LENGTH_UNITS:
+            self.length_unit_input.addItem(name, unit)
+        self.length_unit_input.setCurrentIndex(
+            max(self.length_unit_input.findData(self.user.length_unit), 0)
+        )
+        self.length_unit_input.currentIndexChanged.connect(self.update_length_estimate)
+        self.length_settings_box.addRow(self.length_unit_label, self.length_unit_input)
+
+        self.min_length_label = QLabel("Minimum")
+        self.min_length_input = QSpinBox()
+        self.min_length_input.setRange(0, MAX_LENGTH)
+        self.min_length_input.setValue(self.user.min_length)
+        self.min_length_input.valueChanged.connect(self.update_length_estimate)
+        self.length_settings_box.addRow(self.min_length_label, self.min_length_input)
+
+        self.max_length_label = QLabel("Maximum")
+        self.max_length_input = QSpinBox()
+        self.max_length_input.setRange(0, MAX_LENGTH)
+        self.max_length_input.setSpecialValueText("No limit")
+        self.max_length_input.setValue(self.user.max_length)
+        self.max_length_input.valueChanged.connect(self.update_length_estimate)
+        self.length_settings_box.addRow(self.max_length_label, self.max_length_input)
+
+        self.length_settings_box.addRow(self.length_estimate_label)
+        self.update_length_estimate()
+
+        self.length_tab.setLayout(self.length_settings_box)
+
+    def update_length_estimate(self):
+        """Show how many sentences pass the length filter and their mean timer"""
+        current_list = self.mw.controller.current_list
+        if not current_list or not current_list.size:
+            self.length_estimate_label.setText("")
+            return
+
+        index = current_list.length_index(self.length_unit_input.currentData())
+        min_length = self.min_length_input.value()
+        max_length = self.max_length_input.value() or None
+        count = index.count(min_length, max_length)
+        if self.char_based_timer_cb.isChecked():
+            mean_chars = index.mean_chars(min_length, max_length)
+            timer_ms = mean_chars * self.char_timer_slider.value()
+        else:
+            timer_ms = self.timer_input.value() * 1000
+        self.length_estimate_label.setText(
+            f"{count} sentences, ~{timer_ms / 1000:.1f}s timer each"
+        )
+
     def shortcut_tab_content(self):
         """Widgets for the shortcuts tab"""
         self.shortcut_grid = QGridLayout()
@@ -137,6 +221,7 @@ class SettingsWindow(QMainWindow):
         """Slot function for characters per millisecond slider widget"""
         self.user.char_timer_value = value
         self.char_timer_label.setText(f"ms/character: {str(value)}")
+        self.update_length_estimate()
 
     def save_settings(self):
         """Set user settings into user object."""
@@ -173,5 +258,10 @@ class SettingsWindow(QMainWindow):
             self.mw.set_dark_mode(False)
             self.user.dark_mode = False
 
+        self.user.selection_mode = self.selection_mode_input.currentData()
+        self.user.length_unit = self.length_unit_input.currentData()
+        self.user.min_length = self.min_length_input.value()
+        self.user.max_length = self.max_length_input.value()
+
         self.mw.no_typing_mode()
         self.close()
@@ -0,0 +1,39 @@
+"""Timing of the steps between process start and the first interactive frame"""
+import sys
+import time
+
+STARTED = time.perf_counter()  # Imported first by main.py, so close to process start
+FLAG = "--profile-startup"
+
+
+class StartupProfile:
+    """Named timestamps of the startup steps, printed if profiling was asked for"""
+
+    def __init__(self, enabled=False, started=STARTED, clock=time.perf_counter):
+        self.enabled = enabled
+        self.clock = clock
+        self.marks = [("start", started)]
+
+    @classmethod
+    def from_argv(cls, argv):
+        """Profile enabled by the --profile-startup command line flag"""
+        return cls(FLAG in argv)
+
+    def mark(self, step):
+        """Record that a startup step has just finished"""
+        self.marks.append((step, self.clock()))
+
+    def report(self, file=sys.stderr):
+        """Print the time taken by each step and since start, in milliseconds"""
+        if not self.enabled:
+            return
+        width = max(len(step) for step, _ in self.marks)
+        print(f"{'step':<{width}}  {'ms':>8}  {'total':>8}", file=file)
+        started = previous = self.marks[0][1]
+        for step, at in self.marks[1:]:
+            print(
+                f"{step:<{width}}  {(at - previous) * 1000:8.1f}  "
+                f"{(at - started) * 1000:8.1f}",
+                file=file,
+            )
+            previous = at
@@ -0,0 +1,63 @@
+"""Attempt totals kept in the rollup tables as answers are graded"""
+
+# Columns shared by the listStats, sentenceStats and dayStats tables
+STATS_COLUMNS = (
+    "attempts",
+    "correct",
+    "exposureMs",
+    "exposures",
+    "streak",
+    "bestStreak",
+)
+
+
+class AttemptStats:
+    """Running totals of attempts at a list, a sentence or on a day"""
+
+    __slots__ = (
+        "attempts",
+        "correct",
+        "exposure_ms",
+        "exposures",
+        "streak",
+        "best_streak",
+    )
+
+    def __init__(
+        self, attempts=0, correct=0, exposure_ms=0, exposures=0, streak=0, best_streak=0
+    ):
+        self.attempts = attempts
+        self.correct = correct
+        self.exposure_ms = exposure_ms  # Total of the timed attempts
+        self.exposures = exposures  # Number of timed attempts
+        self.streak = streak  # Correct answers in a row up to the latest
+        self.best_streak = best_streak
+
+    def add(self, correct, exposure_ms=None):
+        """Count one more attempt, as the rollup triggers do"""
+        self.attempts += 1
+        if correct:
+            self.correct += 1
+            self.streak += 1
+            self.best_streak = max(self.best_streak, self.streak)
+        else:
+            self.streak = 0
+        if exposure_ms is not None:
+            self.exposure_ms += exposure_ms
+            self.exposures += 1
+
+    @property
+    def mean_exposure_ms(self):
+        """Mean time sentences were shown, or None if no attempt was timed"""
+        return self.exposure_ms / self.exposures if self.exposures else None
+
+    def as_row(self):
+        """Values of the rollup table columns, in STATS_COLUMNS order"""
+        return (
+            self.attempts,
+            self.correct,
+            self.exposure_ms,
+            self.exposures,
+            self.streak,
+            self.best_streak,
+        )
@@ -0,0 +1,71 @@
+"""Window showing the attempt rollups of the current list, sentence and days"""
+from PyQt5.QtWidgets import (
+    QMainWindow,
+    QWidget,
+    QVBoxLayout,
+    QFormLayout,
+    QLabel,
+    QListWidget,
+    QPushButton,
+)
+
+
+def describe(stats):
+    """One line summary of an AttemptStats"""
+    if stats is None or not stats.attempts:
+        return "No attempts yet"
+    text = (
+        f"{stats.attempts} attempts, {100 * stats.correct / stats.attempts:.0f}% "
+        f"correct, streak {stats.streak} (best {stats.best_streak})"
+    )
+    if stats.mean_exposure_ms is not None:
+        text += f", shown {stats.mean_exposure_ms / 1000:.1f} s on average"
+    return text
+
+
+class StatsWindow(QMainWindow):
+    """Practice statistics, read from the rollups rather than the history"""
+
+    def __init__(self, mw):
+        super().__init__()
+
+        self.mw = mw
+
+        self.resize(480, 320)
+        self.setWindowTitle("Statistics")
+
+        self.list_label = QLabel("")
+        self.list_label.setWordWrap(True)
+        self.sentence_label = QLabel("")
+        self.sentence_label.setWordWrap(True)
+
+        self.days = QListWidget()
+        self.days.setUniformItemSizes(True)
+
+        self.refresh_btn = QPushButton("Refresh")
+        self.refresh_btn.clicked.connect(self.refresh)
+
+        self.form_layout = QFormLayout()
+        self.form_layout.addRow("Current list:", self.list_label)
+        self.form_layout.addRow("Current sentence:", self.sentence_label)
+
+        self.layout = QVBoxLayout()
+        self.layout.addLayout(self.form_layout)
+        self.layout.addWidget(QLabel("Recent days:"))
+        self.layout.addWidget(self.days)
+        self.layout.addWidget(self.refresh_btn)
+
+        self.window = QWidget(self)
+        self.setCentralWidget(self.window)
+        self.window.setLayout(self.layout)
+
+        self.refresh()
+
+    def refresh(self):
+        """Read the statistics again"""
+        engine = self.mw.engine
+        self.list_label.setText(describe(engine.list_stats()))
+        self.sentence_label.setText(describe(engine.current_sentence_stats()))
+        self.days.clear()
+        for day, stats in reversed(engine.daily_stats()):
+            self.days.addItem(f"{day}: {describe(stats)}")
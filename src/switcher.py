@@ -0,0 +1,55 @@
+"""Quick-switcher popup for jumping to a sentence list by title"""
+from PyQt5.QtCore import Qt
+from PyQt5.QtWidgets import QDialog, QLineEdit, QListWidget, QVBoxLayout
+
+
+class QuickSwitcher(QDialog):
+    """Popup listing the lists best matching the title typed so far"""
+
+    def __init__(self, mw):
+        super().__init__(mw)
+
+        self.mw = mw
+        self.matches = []  # Sentence lists shown in results, best first
+
+        self.setWindowTitle("Switch List")
+        self.resize(320, 240)
+
+        self.search_line = QLineEdit()
+        self.search_line.setPlaceholderText("List title")
+        self.search_line.textChanged.connect(self.update_results)
+        self.search_line.returnPressed.connect(self.switch_to_selected)
+
+        self.results = QListWidget()
+        self.results.setUniformItemSizes(True)
+        self.results.itemActivated.connect(self.switch_to_selected)
+
+        self.layout = QVBoxLayout()
+        self.layout.addWidget(self.search_line)
+        self.layout.addWidget(self.results)
+        self.setLayout(self.layout)
+
+        self.update_results("")
+
+    def update_results(self, query):
+        """Show the best matches for the query"""
+        self.matches = self.mw.engine.search_lists(query)
+        self.results.clear()
+        self.results.addItems([sentence_list.title for sentence_list in self.matches])
+        self.results.setCurrentRow(0 if self.matches else -1)
+
+    def keyPressEvent(self, event):
+        """Move through the results with the arrow keys while typing"""
+        if event.key() in (Qt.Key_Up, Qt.Key_Down) and self.matches:
+            step = -1 if event.key() == Qt.Key_Up else 1
+            row = (self.results.currentRow() + step) % len(self.matches)
+            self.results.setCurrentRow(row)
+        else:
+            super().keyPressEvent(event)
+
+    def switch_to_selected(self, item=None):
+        """Use the highlighted list and close the popup"""
+        row = self.results.currentRow()
+        if 0 <= row < len(self.matches):
+            self.mw.use_sentence_list(self.matches[row])
+            self.accept()
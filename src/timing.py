@@ -0,0 +1,52 @@
+"""Exposure and answer timing on the high-resolution monotonic clock"""
+import time
+
+NS_PER_MS = 1_000_000
+
+
+class SentenceTiming:
+    """When one sentence was shown, hidden and answered, in clock nanoseconds
+
+    The view marks the sentence shown and hidden once the change has been
+    painted, so exposure is the time the user could actually see it rather
+    than the timer's nominal duration. Until then the times are those at
+    which the sentence was picked and the answer given.
+    """
+
+    __slots__ = ("clock", "shown_ns", "hidden_ns", "answered_ns")
+
+    def __init__(self, clock=time.perf_counter_ns):
+        self.clock = clock
+        self.shown_ns = clock()
+        self.hidden_ns = None
+        self.answered_ns = None
+
+    def mark_shown(self):
+        """Restart the exposure when the sentence has been painted"""
+        if self.hidden_ns is None:
+            self.shown_ns = self.clock()
+
+    def mark_hidden(self):
+        """End the exposure when the sentence has been painted over"""
+        if self.hidden_ns is None:
+            self.hidden_ns = self.clock()
+
+    def mark_answered(self):
+        """Note the answer; an answer given while visible also hides the sentence"""
+        if self.answered_ns is None:
+            self.answered_ns = self.clock()
+            self.mark_hidden()
+
+    @property
+    def exposure_ms(self):
+        """Milliseconds the sentence was visible, None while it still is"""
+        if self.hidden_ns is None:
+            return None
+        return round((self.hidden_ns - self.shown_ns) / NS_PER_MS)
+
+    @property
+    def latency_ms(self):
+        """Milliseconds from showing the sentence to the answer, None before it"""
+        if self.answered_ns is None:
+            return None
+        return round((self.answered_ns - self.shown_ns) / NS_PER_MS)
@@ -0,0 +1,134 @@
+"""In-memory index of sentence list titles for finding lists as the user types"""
+import heapq
+from bisect import bisect_left, insort
+from collections import Counter
+from itertools import islice
+
+MAX_RESULTS = 20
+MIN_SIMILARITY = 0.5  # Share of the query's trigrams a fuzzy match must contain
+
+
+def fold(title):
+    """Case- and whitespace-insensitive form of a title"""
+    return " ".join(title.casefold().split())
+
+
+def title_trigrams(folded):
+    """Trigrams of each word padded with a space on both sides"""
+    trigrams = set()
+    for word in folded.split(" "):
+        padded = f" {word} "
+        trigrams.update(padded[i : i + 3] for i in range(len(padded) - 2))
+    return trigrams
+
+
+def query_trigrams(folded):
+    """Trigrams of each query word, not padded at the end of the last one
+
+    The last word is usually still being typed, so it should match the start
+    of a longer word in a title.
+    """
+    trigrams = set()
+    words = folded.split(" ")
+    for index, word in enumerate(words):
+        padded = f" {word} " if index < len(words) - 1 else f" {word}"
+        trigrams.update(padded[i : i + 3] for i in range(len(padded) - 2))
+    return trigrams
+
+
+class TitleIndex:
+    """Sentence lists looked up by title prefix or by shared trigrams
+
+    Titles are kept sorted for prefix search by bisection, and every word
+    trigram maps to the lists whose title contains it, so typos and words
+    typed out of order still find a list. Lists are keyed by identity as
+    SentenceList equality compares contents.
+    """
+
+    def __init__(self, sentence_lists=()):
+        self.entries = {}  # id(sentence_list): (sentence_list, folded title)
+        self.sorted_titles = []  # (folded title, id) pairs in order
+        self.postings = {}  # Trigram: set of ids of titles containing it
+        for sentence_list in sentence_lists:
+            self.add(sentence_list)
+
+    def __len__(self):
+        return len(self.entries)
+
+    def add(self, sentence_list):
+        """Index a list under its current title"""
+        key = id(sentence_list)
+        if key in self.entries:
+            self.remove(sentence_list)
+        folded = fold(sentence_list.title)
+        self.entries[key] = (sentence_list, folded)
+        insort(self.sorted_titles, (folded, key))
+        for trigram in title_trigrams(folded):
+            self.postings.setdefault(trigram, set()).add(key)
+
+    def remove(self, sentence_list):
+        """Drop a list from the index"""
+        key = id(sentence_list)
+        entry = self.entries.pop(key, None)
+        if entry is None:
+            return
+        folded = entry[1]
+        del self.sorted_titles[bisect_left(self.sorted_titles, (folded, key))]
+        for trigram in title_trigrams(folded):
+            keys = self.postings[trigram]
+            keys.discard(key)
+            if not keys:
+                del self.postings[trigram]
+
+    def rename(self, sentence_list):
+        """Re-index a list after its title changed"""
+        self.add(sentence_list)
+
+    def prefix_matches(self, folded, limit=None):
+        """Ids of titles starting with folded, in title order"""
+        keys = []
+        start = bisect_left(self.sorted_titles, (folded,))
+        for title, key in islice(self.sorted_titles, start, None):
+            if not title.startswith(folded) or len(keys) == limit:
+                break
+            keys.append(key)
+        return keys
+
+    def search(self, query, limit=MAX_RESULTS):
+        """Lists best matching the query, best first
+
+        Exact titles rank first, then titles starting with the query, then
+        titles containing it, then titles sharing enough of its trigrams.
+        """
+        folded = fold(query)
+        if not folded:
+            return [self.entries[key][0] for key in self.prefix_matches("", limit)]
+
+        scores = {key: 2.0 for key in self.prefix_matches(folded, limit)}
+        trigrams = query_trigrams(folded)
+        shared = Counter()
+        for trigram in trigrams:
+            shared.update(self.postings.get(trigram, ()))
+        for key, count in shared.items():
+            similarity = count / len(trigrams)
+            title = self.entries[key][1]
+            if title == folded:
+                similarity += 3
+            elif title.startswith(folded):
+                similarity += 2
+            elif folded in title:
+                similarity += 1
+            elif similarity < MIN_SIMILARITY:
+                continue
+            scores[key] = max(scores.get(key, 0), similarity)
+
+        ranked = heapq.nsmallest(
+            limit,
+            scores,
+            key=lambda key: (
+                -scores[key],
+                len(self.entries[key][1]),
+                self.entries[key][1],
+            ),
+        )
+        return [self.entries[key][0] for key in ranked]
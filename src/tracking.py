@@ -0,0 +1,45 @@
+"""Change tracking for objects persisted to the database"""
+
+_MISSING = object()
+
+
+class DirtyTracked:
+    """Mixin recording which persisted attributes changed since the last save
+
+    Subclasses name their persisted attributes in tracked_fields and call
+    mark_clean once they match what is stored.
+    """
+
+    __slots__ = ("_dirty",)
+
+    tracked_fields = ()
+
+    def __setattr__(self, name, value):
+        if name in self.tracked_fields and getattr(self, name, _MISSING) != value:
+            self.mark_dirty(name)
+        super().__setattr__(name, value)
+
+    def mark_dirty(self, name):
+        """Flag a tracked attribute as changed"""
+        try:
+            self._dirty.add(name)
+        except AttributeError:
+            super().__setattr__("_dirty", {name})
+
+    def mark_clean(self):
+        """Forget recorded changes, e.g. after they have been written"""
+        super().__setattr__("_dirty", set())
+
+    @property
+    def dirty_fields(self):
+        """Names of tracked attributes changed since the last save"""
+        return frozenset(getattr(self, "_dirty", ()))
+
+    @property
+    def is_dirty(self):
+        """Whether any tracked attribute changed since the last save"""
+        return bool(getattr(self, "_dirty", None))
+
+    def dirty_values(self):
+        """Map of changed attribute names to their current values"""
+        return {name: getattr(self, name) for name in self.dirty_fields}
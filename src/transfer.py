@@ -0,0 +1,303 @@
+"""Streaming export and import of a whole profile as NDJSON
+
+An export holds one JSON record per line:
+
+    {"type": "header", "format": "memory-builder", "version": 1, "exportId": ...}
+    {"type": "user", "settings": {...}}
+    {"type": "list", "id": ..., "title": ..., ...}
+    {"type": "sentences", "list": ..., "start": ..., "texts": [...]}
+    {"type": "reviews", "list": ..., "rows": [...]}
+    {"type": "attempts", "rows": [...]}
+    {"type": "end", "lists": ..., "sentences": ..., "attempts": ...}
+
+Each list is followed by its sentences and reviews, and the attempt history
+comes last in the order it was recorded. Lists read from a sentence pack
+are exported with the pack's sentences and no packPath, so they import as
+ordinary lists on any machine; an export fails if a pack cannot be read.
+Files ending in .gz are gzip compressed, and files ending in .zst are zstd
+compressed when the zstandard package is installed.
+
+Run `python transfer.py export data.db profile.ndjson.gz` to write an
+export and `python transfer.py import data.db profile.ndjson.gz` to add one
+to a database. An import that stops part way resumes where it left off when
+run again.
+"""
+import argparse
+import gzip
+import io
+import json
+import os
+import sys
+import tempfile
+import time
+import uuid
+from itertools import islice
+import db
+import pack
+from importer import batched
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+FORMAT = "memory-builder"
+FORMAT_VERSION = 1
+BATCH_SIZE = 1000  # Sentences, reviews or attempts per record
+COMMIT_LINES = 50  # Records imported per transaction
+LIST_FIELDS = (
+    "id",
+    "title",
+    "numCompleted",
+    "numCorrect",
+    "digest",
+    "size",
+    "deckSeed",
+    "deckPosition",
+    "packPath",
+)
+
+
+class TransferError(ValueError):
+    """Raised for files that are not valid exports"""
+
+
+def open_stream(path, mode, compression_path=None):
+    """Open an export for reading ("r") or writing ("w") as UTF-8 text
+
+    The compression is chosen by the suffix of compression_path, which
+    defaults to path.
+    """
+    suffix = os.path.splitext(compression_path or path)[1]
+    if suffix == ".gz":
+        return gzip.open(path, mode + "t", encoding="utf-8")
+    if suffix == ".zst":
+        if zstandard is None:
+            raise TransferError("zstd exports need the zstandard package")
+        file = open(path, mode + "b")
+        if mode == "w":
+            stream = zstandard.ZstdCompressor().stream_writer(file, closefd=True)
+        else:
+            stream = zstandard.ZstdDecompressor().stream_reader(file, closefd=True)
+        return io.TextIOWrapper(stream, encoding="utf-8")
+    return open(path, mode, encoding="utf-8")
+
+
+def write_record(stream, record):
+    """Write one record as a line of JSON"""
+    stream.write(json.dumps(record, ensure_ascii=False, separators=(",", ":")))
+    stream.write("\n")
+
+
+def export_profile(conn, path, batch_size=BATCH_SIZE):
+    """Write the whole profile to path, replacing it atomically
+
+    Returns the counts written to the end record. Rows are read and written
+    batch_size at a time, so memory use does not grow with the database.
+    """
+    counts = {"lists": 0, "sentences": 0, "attempts": 0}
+    directory = os.path.dirname(os.path.abspath(path))
+    handle, temp_path = tempfile.mkstemp(dir=directory)
+    os.close(handle)
+    try:
+        with open_stream(temp_path, "w", path) as stream:
+            write_record(
+                stream,
+                {
+                    "type": "header",
+                    "format": FORMAT,
+                    "version": FORMAT_VERSION,
+                    "schema": db.SCHEMA_VERSION,
+                    "exportId": uuid.uuid4().hex,
+                    "created": time.time(),
+                },
+            )
+            for user in db.get_all_users(conn)[:1]:
+                settings = dict(zip(db.USER_COLUMNS, user))
+                write_record(stream, {"type": "user", "settings": settings})
+            for row in db.get_all_sentence_lists(conn):
+                counts["sentences"] += export_list(conn, stream, row, batch_size)
+                counts["lists"] += 1
+            for rows in batched(db.iter_attempts(conn), batch_size):
+                write_record(stream, {"type": "attempts", "rows": rows})
+                counts["attempts"] += len(rows)
+            write_record(stream, dict(type="end", **counts))
+        os.replace(temp_path, path)
+    except BaseException:
+        os.remove(temp_path)
+        raise
+    return counts
+
+
+def export_list(conn, stream, row, batch_size):
+    """Write a list with its sentences and reviews; returns its sentence count"""
+    record = dict(zip(LIST_FIELDS, row))
+    list_id = record["id"]
+    if record["packPath"] is None:
+        sentences = db.iter_sentences(conn, list_id)
+    else:
+        try:
+            sentences = pack.open_pack(record["packPath"])
+        except (OSError, pack.PackError) as err:
+            raise TransferError(
+                f"cannot export list {record['title']!r} from its pack: {err}"
+            ) from err
+        record["packPath"] = None
+    write_record(stream, dict(type="list", **record))
+    count = 0
+    for texts in batched(sentences, batch_size):
+        write_record(
+            stream,
+            {"type": "sentences", "list": list_id, "start": count, "texts": texts},
+        )
+        count += len(texts)
+    for rows in batched(db.iter_reviews(conn, list_id), batch_size):
+        write_record(stream, {"type": "reviews", "list": list_id, "rows": rows})
+    return count
+
+
+def read_header(line):
+    """Check the first line of an export and return its export id"""
+    try:
+        header = json.loads(line)
+    except ValueError:
+        header = None
+    if not isinstance(header, dict) or header.get("format") != FORMAT:
+        raise TransferError("not a Memory Builder export")
+    if header.get("version") != FORMAT_VERSION:
+        raise TransferError(f"unsupported export version {header.get('version')}")
+    return header["exportId"]
+
+
+def import_profile(conn, path, commit_lines=COMMIT_LINES):
+    """Add an export to the database; returns True once it is fully imported
+
+    Records are applied commit_lines at a time, each group in one
+    transaction together with the number of lines done, so an import that
+    stops resumes after the last group committed. Lists already stored with
+    the same sentences are reused instead of copied and keep their own
+    reviews and attempts, so importing a backup into the profile it came
+    from adds no history twice. An export that was imported before is
+    skipped.
+    """
+    with open_stream(path, "r") as stream:
+        export_id = read_header(stream.readline())
+        state = db.get_transfer(conn, export_id)
+        if state is not None and state[1]:
+            print(f"{path} was already imported")
+            return True
+        line = state[0] if state is not None else 0
+        list_ids = db.get_transfer_lists(conn, export_id)
+
+        finished = False
+        for lines in batched(islice(stream, line, None), commit_lines):
+            with conn.transaction():
+                for text in lines:
+                    finished = apply_record(conn, export_id, json.loads(text), list_ids)
+                line += len(lines)
+                db.set_transfer(conn, export_id, line, finished)
+
+    if not finished:
+        print(f"{path} ends before its end record; import it again once complete")
+    return finished
+
+
+def apply_record(conn, export_id, record, list_ids):
+    """Write one export record; returns True for the end record"""
+    kind = record.get("type")
+    if kind == "user":
+        import_user(conn, record["settings"])
+    elif kind == "list":
+        import_list(conn, export_id, record, list_ids)
+    elif kind == "sentences":
+        list_id, existing = list_ids[record["list"]]
+        if not existing:
+            start = record["start"]
+            count = db.insert_sentences(conn, list_id, record["texts"], start)
+            db.flag_near_duplicates(conn, list_id, start, start + count)
+    elif kind == "reviews":
+        list_id, existing = list_ids[record["list"]]
+        if not existing:
+            db.save_reviews(conn, [(list_id, *row) for row in record["rows"]])
+    elif kind == "attempts":
+        db.add_attempts(
+            conn,
+            [
+                (list_ids[row[0]][0], *row[1:])
+                for row in record["rows"]
+                if row[0] in list_ids and not list_ids[row[0]][1]
+            ],
+        )
+    elif kind == "end":
+        return True
+    else:
+        raise TransferError(f"unknown export record {kind!r}")
+    return False
+
+
+def import_user(conn, settings):
+    """Take the exported user settings, adding the user if there is none"""
+    settings = {name: settings[name] for name in db.USER_COLUMNS if name in settings}
+    if db.get_all_users(conn):
+        db.update_user_fields(conn, settings)
+    else:
+        db.add_user(conn, [settings.get(name) for name in db.USER_COLUMNS])
+
+
+def import_list(conn, export_id, record, list_ids):
+    """Create the list of a list record, or reuse a stored list with its digest"""
+    list_id = None
+    if record["packPath"] is None and record["digest"]:
+        list_id = db.find_sentence_list(conn, record["digest"])
+    existing = list_id is not None
+    if record["packPath"] is not None:
+        list_id = db.add_pack_list(
+            conn, record["title"], record["packPath"], record["digest"], record["size"]
+        )
+    elif not existing:
+        list_id = db.insert_list(conn, record["title"])
+        db.set_list_content(conn, list_id, record["digest"], record["size"])
+    if not existing:
+        db.update_sentence_list_fields(
+            conn,
+            list_id,
+            {
+                "num_completed": record["numCompleted"],
+                "num_correct": record["numCorrect"],
+                "deck_seed": record["deckSeed"],
+                "deck_position": record["deckPosition"],
+            },
+        )
+    db.add_transfer_list(conn, export_id, record["id"], list_id, existing)
+    list_ids[record["id"]] = (list_id, existing)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("command", choices=("export", "import"))
+    parser.add_argument("database", help="Memory Builder database, e.g. data.db")
+    parser.add_argument("file", help="NDJSON export, optionally .gz or .zst")
+    args = parser.parse_args(argv)
+
+    conn = db.create_connection(args.database)
+    try:
+        if args.command == "export":
+            counts = export_profile(conn, args.file)
+            print(
+                f"Exported {counts['lists']} lists, {counts['sentences']} sentences "
+                f"and {counts['attempts']} attempts to {args.file}"
+            )
+        elif import_profile(conn, args.file):
+            print(f"Imported {args.file}")
+        else:
+            return 1
+    except (OSError, TransferError) as err:
+        print(err)
+        return 1
+    finally:
+        conn.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,19 @@
+from dedupe import LineSet, line_key, unique_lines
+
+
+def test_line_set_grows_and_keeps_every_key():
+    keys = LineSet(capacity=4)
+    for key in range(1, 1001):
+        assert keys.add(key * 1024)
+    assert keys.count == 1000
+    assert 2 * keys.count <= len(keys.slots)
+    assert not any(keys.add(key * 1024) for key in range(1, 1001))
+    assert sorted(key for key in keys.slots if key) == [
+        key * 1024 for key in range(1, 1001)
+    ]
+
+
+def test_unique_lines_keeps_first_occurrences_in_order():
+    lines = [f"line {i % 700}" for i in range(3000)]
+    assert list(unique_lines(lines)) == [f"line {i}" for i in range(700)]
+    assert line_key("") != 0
@@ -0,0 +1,22 @@
+from length_index import CHARS, WORDS, LengthIndex
+
+SENTENCES = ["a b", "abc def ghi", "x", "one two three four", "hello there"]
+
+
+def test_span_covers_the_length_range():
+    index = LengthIndex.from_sentences(SENTENCES, WORDS)
+    start, stop = index.span(2, 3)
+    assert sorted(index.positions[start:stop]) == [0, 1, 4]
+    assert index.span(5) == (len(SENTENCES), len(SENTENCES))
+    assert index.count() == len(SENTENCES)
+    assert index.count(4, 3) == 0
+
+
+def test_mean_chars_of_the_range():
+    index = LengthIndex.from_sentences(SENTENCES, CHARS)
+    assert index.mean_chars() == sum(map(len, SENTENCES)) / len(SENTENCES)
+    assert index.mean_chars(3, 11) == (3 + 11 + 11) / 3
+    assert index.mean_chars(100) == 0
+
+    words = LengthIndex.from_sentences(SENTENCES, WORDS)
+    assert words.mean_chars(2, 2) == (3 + 11) / 2
@@ -0,0 +1,25 @@
+from sampler import DECK, SMALL_SIZE, Permutation, SentenceSampler
+
+
+def test_permutation_is_a_bijection():
+    for size in (1, 2, 5, SMALL_SIZE - 1, SMALL_SIZE, 1000, 4097):
+        permutation = Permutation(size, seed=size * 31)
+        assert sorted(permutation[index] for index in range(size)) == list(
+            range(size)
+        )
+
+
+def test_permutation_depends_only_on_seed():
+    first = Permutation(5000, seed=42)
+    second = Permutation(5000, seed=42)
+    other = Permutation(5000, seed=43)
+    assert [first[i] for i in range(100)] == [second[i] for i in range(100)]
+    assert [first[i] for i in range(100)] != [other[i] for i in range(100)]
+
+
+def test_deck_resumes_from_seed_and_position():
+    sampler = SentenceSampler(3000)
+    drawn = [sampler.draw(DECK) for _ in range(1000)]
+    resumed = SentenceSampler(3000, sampler.seed, sampler.position)
+    drawn += [resumed.draw(DECK) for _ in range(2000)]
+    assert sorted(drawn) == list(range(3000))
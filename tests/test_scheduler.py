@@ -0,0 +1,30 @@
+import db
+import importer
+from engine import Engine
+from scheduler import REVIEW
+
+
+def test_review_mode_skips_near_duplicates(tmp_path):
+    path = tmp_path / "sentences.txt"
+    path.write_text(
+        "The quick brown fox jumps over\n"
+        "The quick brown fox jumps over!\n"
+        "A completely different line here\n",
+        encoding="utf-8",
+    )
+    engine = Engine(db.ConnectionManager(str(tmp_path / "data.db")))
+    list_id = importer.import_text_file(engine.connection, str(path), "Foxes")
+    sentence_list, _ = engine.load_sentence_list(list_id)
+    engine.use_sentence_list(sentence_list)
+    engine.user.selection_mode = REVIEW
+    assert sentence_list.duplicates == {1}
+
+    shown = set()
+    for _ in range(4):
+        shown.add(engine.next_sentence())
+        engine.mark_answer(True)
+    assert shown == {
+        "The quick brown fox jumps over",
+        "A completely different line here",
+    }
+    engine.close()
@@ -0,0 +1,69 @@
+import random
+from scoring import edit_distance, edit_opcodes
+
+
+def naive_distance(a, b):
+    previous = list(range(len(b) + 1))
+    for i, x in enumerate(a, 1):
+        current = [i]
+        for j, y in enumerate(b, 1):
+            current.append(
+                min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (x != y))
+            )
+        previous = current
+    return previous[-1]
+
+
+def apply_opcodes(a, b, opcodes):
+    result = []
+    for tag, i1, i2, j1, j2 in opcodes:
+        if tag == "equal":
+            assert a[i1:i2] == b[j1:j2]
+        result.append(b[j1:j2])
+    return "".join(result)
+
+
+def random_pairs(count=500):
+    rng = random.Random(7)
+    for _ in range(count):
+        a = "".join(rng.choices("abc ", k=rng.randint(0, 80)))
+        b = list(a)
+        for _ in range(rng.randint(0, 10)):
+            index = rng.randint(0, len(b))
+            edit = rng.choice(("insert", "delete", "replace"))
+            if edit == "insert":
+                b.insert(index, rng.choice("abcd"))
+            elif b and index < len(b):
+                if edit == "delete":
+                    del b[index]
+                else:
+                    b[index] = rng.choice("abcd")
+        yield a, "".join(b)
+
+
+def test_edit_distance_matches_naive_dp():
+    for a, b in random_pairs():
+        assert edit_distance(a, b) == naive_distance(a, b)
+
+
+def test_edit_distance_of_long_sequences():
+    rng = random.Random(3)
+    a = "".join(rng.choices("abcdefgh", k=300))
+    b = "".join(rng.choices("abcdefgh", k=280))
+    assert edit_distance(a, b) == naive_distance(a, b)
+    assert edit_distance(a.split("a"), b.split("a")) == naive_distance(
+        a.split("a"), b.split("a")
+    )
+
+
+def test_edit_opcodes_rebuild_the_answer_at_minimal_cost():
+    for a, b in random_pairs():
+        opcodes = edit_opcodes(a, b)
+        assert apply_opcodes(a, b, opcodes) == b
+        cost = sum(
+            max(i2 - i1, j2 - j1) for tag, i1, i2, j1, j2 in opcodes if tag != "equal"
+        )
+        assert cost == naive_distance(a, b)
+        assert [opcode[1] for opcode in opcodes] == sorted(
+            opcode[1] for opcode in opcodes
+        )
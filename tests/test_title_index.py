@@ -0,0 +1,30 @@
+from types import SimpleNamespace
+from title_index import TitleIndex
+
+
+def make_lists(*titles):
+    return [SimpleNamespace(title=title) for title in titles]
+
+
+def test_search_ranks_exact_then_prefix_then_fuzzy():
+    lists = make_lists("Spanish verbs", "Spanish", "Verbs of Spain", "French")
+    index = TitleIndex(lists)
+    assert index.search("spanish") == [lists[1], lists[0]]
+    assert index.search("  SPAN") == [lists[1], lists[0], lists[2]]
+    assert lists[2] in index.search("spain verbs")
+    assert index.search("spansh") == [lists[1], lists[0]]
+    assert index.search("") == [lists[3], lists[1], lists[0], lists[2]]
+
+
+def test_rename_and_remove():
+    lists = make_lists("German", "Greek")
+    index = TitleIndex(lists)
+    lists[0].title = "Dutch"
+    index.rename(lists[0])
+    assert index.search("german") == []
+    assert index.search("dutch") == [lists[0]]
+    index.remove(lists[1])
+    index.remove(lists[1])
+    assert len(index) == 1
+    assert index.search("gre") == []
+    assert index.postings.keys() == TitleIndex([lists[0]]).postings.keys()
@@ -0,0 +1,58 @@
+import db
+import importer
+import transfer
+from engine import Engine
+from scheduler import REVIEW
+
+
+def make_profile(path, text_path):
+    text_path.write_text(
+        "".join(f"Sentence number {i} of the list\n" for i in range(25)),
+        encoding="utf-8",
+    )
+    engine = Engine(db.ConnectionManager(str(path)))
+    list_id = importer.import_text_file(engine.connection, str(text_path), "Numbers")
+    sentence_list, _ = engine.load_sentence_list(list_id)
+    engine.use_sentence_list(sentence_list)
+    engine.user.selection_mode = REVIEW
+    for index in range(6):
+        engine.next_sentence()
+        engine.mark_answer(index % 2 == 0)
+    engine.close()
+
+
+def profile_contents(conn):
+    lists = []
+    for row in db.get_all_sentence_lists(conn):
+        record = dict(zip(transfer.LIST_FIELDS, row))
+        lists.append(
+            (
+                record["title"],
+                record["digest"],
+                list(db.iter_sentences(conn, record["id"])),
+                list(db.iter_reviews(conn, record["id"])),
+            )
+        )
+    attempts = [row[1:] for row in db.iter_attempts(conn)]
+    return lists, attempts
+
+
+def test_interrupted_import_resumes_to_the_same_profile(tmp_path):
+    make_profile(tmp_path / "source.db", tmp_path / "numbers.txt")
+    source = db.ConnectionManager(str(tmp_path / "source.db")).connect()
+    export_path = tmp_path / "profile.ndjson"
+    counts = transfer.export_profile(source, str(export_path), batch_size=4)
+    assert counts["sentences"] == 25
+    assert counts["attempts"] == 6
+
+    lines = export_path.read_text(encoding="utf-8").splitlines(keepends=True)
+    partial_path = tmp_path / "partial.ndjson"
+    partial_path.write_text("".join(lines[: len(lines) // 2]), encoding="utf-8")
+
+    target = db.ConnectionManager(str(tmp_path / "target.db")).connect()
+    assert not transfer.import_profile(target, str(partial_path), commit_lines=2)
+    assert transfer.import_profile(target, str(export_path), commit_lines=2)
+    assert profile_contents(target) == profile_contents(source)
+
+    assert transfer.import_profile(target, str(export_path))
+    assert profile_contents(target) == profile_contents(source)